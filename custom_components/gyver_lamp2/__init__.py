@@ -1,19 +1,43 @@
 """The Gyver Lamp 2 integration."""
 from __future__ import annotations
 import logging
+from typing import TYPE_CHECKING
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-
-from .const import DOMAIN
-from .device import GyverLamp2Device
+# Home Assistant импортируется лениво: пакет нужен и CLI протокола (python -m ...protocol)
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["light", "button", "sensor", "select", "number", "switch"]
 
+def __getattr__(name: str):
+    """Build CONFIG_SCHEMA when Home Assistant asks for it."""
+    if name == "CONFIG_SCHEMA":
+        from homeassistant.helpers import config_validation as cv
+        from .const import DOMAIN
+        return cv.config_entry_only_config_schema(DOMAIN)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up integration services."""
+    from .services import async_setup_services
+    from .websocket import async_setup_websocket
+    async_setup_services(hass)
+    async_setup_websocket(hass)
+    return True
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload integration when options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up integration from a config entry."""
+    from .const import DOMAIN
+    from .device import GyverLamp2Device
+    
     hass.data.setdefault(DOMAIN, {})
     
     # Create device instance
@@ -21,15 +45,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     # Load settings from storage
     await device.async_load_settings()
+    await device.async_start()
     
     hass.data[DOMAIN][entry.entry_id] = device
     
     # Setup all platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     return True
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload integration."""
+    from .const import DOMAIN
+    
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        device = hass.data[DOMAIN].pop(entry.entry_id)
+        device.async_stop()
     return unload_ok
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Preset bank import and export."""
+from __future__ import annotations
+import base64
+import binascii
+from typing import Iterator
+
+# Только protocol: банк разбирается и в CLI без Home Assistant
+from .protocol import (
+    MAX_PRESETS,
+    PRESET_KEYS,
+    EFFECTS,
+    PALETTES,
+    REACTION_TYPES,
+    SOUND_REACTIONS,
+)
+
+FORMAT_TEXT = "text"
+FORMAT_BINARY = "binary"
+FORMAT_JSON = "json"
+FORMATS = (FORMAT_TEXT, FORMAT_BINARY, FORMAT_JSON)
+
+_FLAGS = ('fadeBright', 'fromCenter', 'fromPal')
+_CHOICES = {
+    'effect': EFFECTS,
+    'advMode': REACTION_TYPES,
+    'soundReact': SOUND_REACTIONS,
+    'palette': PALETTES,
+}
+
+def _check(key: str, value) -> int:
+    """Validate one preset field."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key}: {value!r} is not a number") from None
+    if key in _FLAGS:
+        valid = value in (0, 1)
+    elif key in _CHOICES:
+        valid = value in _CHOICES[key]
+    else:
+        valid = 0 <= value <= 255
+    if not valid:
+        raise ValueError(f"{key}: {value} is out of range")
+    return value
+
+def _read_bank(values: Iterator) -> tuple[list[dict], int]:
+    """Read count, presets and current preset from a stream of wire values."""
+    try:
+        count = int(next(values))
+        if not 1 <= count <= MAX_PRESETS:
+            raise ValueError(f"Preset count {count} is outside 1-{MAX_PRESETS}")
+        presets = [
+            {key: _check(key, next(values)) for key in PRESET_KEYS}
+            for _ in range(count)
+        ]
+        current = int(next(values))
+    except StopIteration:
+        raise ValueError("Preset bank is truncated") from None
+    except TypeError:
+        # Количество или текущий пресет из JSON не числом
+        raise ValueError("Preset count and current preset must be numbers") from None
+    if next(values, None) is not None:
+        raise ValueError("Preset bank has extra values")
+    if not 1 <= current <= count:
+        raise ValueError(f"Current preset {current} is outside 1-{count}")
+    return presets, current
+
+def encode_bank(presets: list[dict], current: int, fmt: str):
+    """Encode a bank as binary (base64 of GL,2 values, one byte each) or JSON."""
+    if fmt == FORMAT_JSON:
+        return {
+            'presets': [{key: int(preset.get(key, 0)) for key in PRESET_KEYS} for preset in presets],
+            'current_preset': current,
+        }
+    values = [len(presets)]
+    for preset in presets:
+        values.extend(int(preset.get(key, 0)) for key in PRESET_KEYS)
+    values.append(current)
+    return base64.b64encode(bytes(values)).decode()
+
+def decode_bank(data, fmt: str) -> tuple[list[dict], int]:
+    """Decode and validate a bank in one pass, returning presets and current preset."""
+    if fmt == FORMAT_JSON:
+        if not isinstance(data, dict) or not isinstance(data.get('presets'), list):
+            raise ValueError("JSON bank must have a 'presets' list")
+        presets = data['presets']
+        for preset in presets:
+            if not isinstance(preset, dict):
+                raise ValueError("Preset must be an object")
+            missing = [key for key in PRESET_KEYS if key not in preset]
+            if missing:
+                raise ValueError(f"Preset is missing {', '.join(missing)}")
+        # Тот же разбор, что и для кадра: поля подряд в порядке GL,2
+        values = (value for preset in presets for value in (preset[key] for key in PRESET_KEYS))
+        stream = iter([len(presets), *values, data.get('current_preset', 1)])
+        return _read_bank(stream)
+    if not isinstance(data, str):
+        raise ValueError(f"{fmt} bank must be a string")
+    if fmt == FORMAT_BINARY:
+        try:
+            return _read_bank(iter(base64.b64decode(data, validate=True)))
+        except binascii.Error as e:
+            raise ValueError(f"Invalid base64: {e}") from None
+    # Текст - это сам кадр GL,2: ключ сети, тип кадра и значения через запятую
+    parts = data.strip().split(',')
+    if len(parts) < 3 or parts[1] != '2':
+        raise ValueError("Text bank must be a GL,2 frame")
+    return _read_bank(iter(parts[2:]))
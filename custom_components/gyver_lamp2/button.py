@@ -37,6 +37,8 @@ async def async_setup_entry(
 class GyverLamp2Button(ButtonEntity):
     """Button to change presets."""
     
+    _attr_should_poll = False
+    
     def __init__(self, device: GyverLamp2Device, name: str, unique_id_suffix: str, command, icon: str, entity_category):
         """Initialize button."""
         self._device = device
@@ -55,13 +57,18 @@ class GyverLamp2Button(ButtonEntity):
     
     async def async_press(self) -> None:
         """Handle the button press."""
-        if self._command in [CMD_PREV_PRESET, CMD_NEXT_PRESET, CMD_REBOOT]:
-            await self._device.send_command(MODE_CONTROL, self._command)
-        elif self._command == "add_preset":
-            await self._device.add_preset()
-        elif self._command == "delete_preset":
-            await self._device.delete_last_preset()
-        elif self._command == "reset_presets":
-            await self._device.reset_presets()
-        elif self._command == "upload_settings":
-            await self._device.send_settings_command(self._device.settings)
\ No newline at end of file
+        with self._device.trace_command(self.entity_id, self._context):
+            if self._command == CMD_PREV_PRESET:
+                self._device.step_preset(-1)
+            elif self._command == CMD_NEXT_PRESET:
+                self._device.step_preset(1)
+            elif self._command == CMD_REBOOT:
+                await self._device.send_command(MODE_CONTROL, self._command)
+            elif self._command == "add_preset":
+                await self._device.add_preset()
+            elif self._command == "delete_preset":
+                await self._device.delete_last_preset()
+            elif self._command == "reset_presets":
+                await self._device.reset_presets()
+            elif self._command == "upload_settings":
+                await self._device.send_settings_command(self._device.settings)
\ No newline at end of file
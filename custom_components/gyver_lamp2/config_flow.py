@@ -17,7 +17,21 @@ from .const import (
     CONF_IP_ADDRESS,
     CONF_NETWORK_KEY,
     CONF_GROUP_NUMBER,
-    CONF_NAME
+    CONF_NAME,
+    CONF_ENABLE_METRICS,
+    DEFAULT_ENABLE_METRICS,
+    CONF_ENABLE_TRACING,
+    DEFAULT_ENABLE_TRACING,
+    CONF_TRACE_BUFFER_SIZE,
+    DEFAULT_TRACE_BUFFER_SIZE,
+    CONF_ONLINE_TIMEOUT,
+    DEFAULT_ONLINE_TIMEOUT,
+    CONF_JOURNAL_SIZE,
+    DEFAULT_JOURNAL_SIZE,
+    CONF_MAX_FRAME_SIZE,
+    DEFAULT_MAX_FRAME_SIZE,
+    CONF_REFUSE_OVERSIZED,
+    DEFAULT_REFUSE_OVERSIZED,
 )
 
 def get_default_ip() -> str:
@@ -38,6 +52,14 @@ class GyverLamp2ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> GyverLamp2OptionsFlow:
+        """Get the options flow for this handler."""
+        return GyverLamp2OptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -75,4 +97,53 @@ class GyverLamp2ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 ): str,
             }),
             errors=errors
-        )
\ No newline at end of file
+        )
+
+class GyverLamp2OptionsFlow(config_entries.OptionsFlow):
+    """Handle Gyver Lamp 2 options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_ENABLE_METRICS,
+                    default=options.get(CONF_ENABLE_METRICS, DEFAULT_ENABLE_METRICS)
+                ): bool,
+                vol.Optional(
+                    CONF_ENABLE_TRACING,
+                    default=options.get(CONF_ENABLE_TRACING, DEFAULT_ENABLE_TRACING)
+                ): bool,
+                vol.Optional(
+                    CONF_TRACE_BUFFER_SIZE,
+                    default=options.get(CONF_TRACE_BUFFER_SIZE, DEFAULT_TRACE_BUFFER_SIZE)
+                ): vol.All(int, vol.Range(min=10, max=10000)),
+                vol.Optional(
+                    CONF_ONLINE_TIMEOUT,
+                    default=options.get(CONF_ONLINE_TIMEOUT, DEFAULT_ONLINE_TIMEOUT)
+                ): vol.All(int, vol.Range(min=0, max=86400)),
+                vol.Optional(
+                    CONF_JOURNAL_SIZE,
+                    default=options.get(CONF_JOURNAL_SIZE, DEFAULT_JOURNAL_SIZE)
+                ): vol.All(int, vol.Range(min=1, max=1000)),
+                vol.Optional(
+                    CONF_MAX_FRAME_SIZE,
+                    default=options.get(CONF_MAX_FRAME_SIZE, DEFAULT_MAX_FRAME_SIZE)
+                ): vol.All(int, vol.Range(min=64, max=65507)),
+                vol.Optional(
+                    CONF_REFUSE_OVERSIZED,
+                    default=options.get(CONF_REFUSE_OVERSIZED, DEFAULT_REFUSE_OVERSIZED)
+                ): bool,
+            })
+        )
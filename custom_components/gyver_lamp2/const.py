@@ -1,7 +1,34 @@
 """Constants."""
 from homeassistant.const import CONF_IP_ADDRESS, CONF_NAME
 
+# UDP протокол и таблицы живут в protocol.py, который не зависит от Home Assistant:
+# его командная строка работает без него, поэтому и __init__.py импортирует модули
+# интеграции только внутри функций. Здесь имена реэкспортируются для платформ
+from .protocol import (  # noqa: F401
+    MODE_CONTROL,
+    MODE_SETTINGS,
+    MODE_PRESETS,
+    CMD_OFF,
+    CMD_ON,
+    CMD_PREV_PRESET,
+    CMD_NEXT_PRESET,
+    CMD_SELECT_PRESET,
+    CMD_REBOOT,
+    MAX_PRESETS,
+    EFFECTS,
+    PALETTES,
+    REACTION_TYPES,
+    SOUND_REACTIONS,
+    CHANGE_PERIODS,
+    ADC_MODES,
+    LAMP_TYPES,
+)
+
 DOMAIN = "gyver_lamp2"
+# Менеджер групповых светильников хранится отдельно от устройств
+DATA_GROUPS = f"{DOMAIN}_groups"
+# Недавние кадры HA по портам, общие для всех записей
+DATA_ECHOES = f"{DOMAIN}_echoes"
 DEFAULT_NAME = "Gyver Lamp 2"
 DEFAULT_KEY = "GL"
 DEFAULT_GROUP = 1
@@ -9,102 +36,74 @@ DEFAULT_GROUP = 1
 CONF_NETWORK_KEY = "network_key"
 CONF_GROUP_NUMBER = "group_number"
 
-# UDP Protocol
-MODE_CONTROL = 0
-MODE_SETTINGS = 1
-MODE_PRESETS = 2
-CMD_OFF = 0
-CMD_ON = 1
-CMD_PREV_PRESET = 4
-CMD_NEXT_PRESET = 5
-CMD_SELECT_PRESET = 6
-CMD_REBOOT = 11
-
-# Effects (актуальные из исходников)
-EFFECTS = {
-    1: "Перлин",
-    2: "Цвет", 
-    3: "Смена цвета",
-    4: "Градиент",
-    5: "Частицы",
-    6: "Огонь",
-    7: "Огонь 2020",
-    8: "Конфетти",
-    9: "Смерч",
-    10: "Часы",
-    11: "Погода"
-}
-
-# Palettes
-PALETTES = {
-    1: "Кастом",
-    2: "Тепловая",
-    3: "Огненная", 
-    4: "Лава",
-    5: "Вечеринка",
-    6: "Радуга",
-    7: "Полосатая радуга",
-    8: "Облака",
-    9: "Океан",
-    10: "Лес",
-    11: "Закат",
-    12: "Полиция",
-    13: "Оптимус Прайм",
-    14: "Тёплая лава",
-    15: "Холодная лава",
-    16: "Горячая лава",
-    17: "Розовая лава",
-    18: "Уютный",
-    19: "Киберпанк",
-    20: "Девчачая",
-    21: "Рождество",
-    22: "Кислота",
-    23: "Синий дым",
-    24: "Жвачка",
-    25: "Леопард",
-    26: "Аврора"
-}
+# Options
+CONF_ENABLE_METRICS = "enable_metrics"
+DEFAULT_ENABLE_METRICS = False
+CONF_ENABLE_TRACING = "enable_tracing"
+DEFAULT_ENABLE_TRACING = False
+CONF_TRACE_BUFFER_SIZE = "trace_buffer_size"
+DEFAULT_TRACE_BUFFER_SIZE = 500
+CONF_ONLINE_TIMEOUT = "online_timeout"
+DEFAULT_ONLINE_TIMEOUT = 0  # секунды, 0 = отслеживание выключено
+CONF_JOURNAL_SIZE = "journal_size"
+DEFAULT_JOURNAL_SIZE = 50
+CONF_MAX_FRAME_SIZE = "max_frame_size"
+DEFAULT_MAX_FRAME_SIZE = 1472  # MTU 1500 - заголовки IP и UDP
+CONF_REFUSE_OVERSIZED = "refuse_oversized"
+DEFAULT_REFUSE_OVERSIZED = False
 
-# Reaction types (ИСПРАВЛЕНО по прошивке)
-REACTION_TYPES = {
-    1: "Нет",        # GL_ADV_NONE
-    2: "Громкость",  # GL_ADV_VOL
-    3: "Низкие",     # GL_ADV_LOW
-    4: "Высокие",    # GL_ADV_HIGH
-    5: "Часы"        # GL_ADV_CLOCK
-}
+# Services
+SERVICE_UPDATE_PRESET = "update_preset"
+SERVICE_INSERT_PRESET = "insert_preset"
+SERVICE_DELETE_PRESET = "delete_preset"
+SERVICE_MOVE_PRESET = "move_preset"
+SERVICE_SWAP_PRESETS = "swap_presets"
+SERVICE_DUPLICATE_PRESETS = "duplicate_presets"
+SERVICE_START_PLAYLIST = "start_playlist"
+SERVICE_STOP_PLAYLIST = "stop_playlist"
+SERVICE_EXPORT_PRESETS = "export_presets"
+SERVICE_IMPORT_PRESETS = "import_presets"
+SERVICE_FLEET_APPLY = "fleet_apply"
+SERVICE_START_PREVIEW = "start_preview"
+SERVICE_COMMIT_PREVIEW = "commit_preview"
+SERVICE_REVERT_PREVIEW = "revert_preview"
+SERVICE_START_STREAM = "start_stream"
+SERVICE_STREAM_SAMPLE = "stream_sample"
+SERVICE_STOP_STREAM = "stop_stream"
+ATTR_DEVICE_ID = "device_id"
+ATTR_INDEX = "index"
+ATTR_TO_INDEX = "to_index"
+ATTR_COUNT = "count"
+ATTR_PRESETS = "presets"
+ATTR_DURATION = "duration"
+ATTR_DURATIONS = "durations"
+ATTR_RANDOM = "random"
+ATTR_FROM_HOUR = "from_hour"
+ATTR_TO_HOUR = "to_hour"
+ATTR_FORMAT = "format"
+ATTR_DATA = "data"
+ATTR_POWER = "power"
+ATTR_PRESET = "preset"
+ATTR_BRIGHTNESS = "brightness"
+ATTR_PARALLEL = "parallel"
+ATTR_RATE = "rate"
+ATTR_COLOR = "color"
+ATTR_RGB_COLOR = "rgb_color"
+ATTR_TRANSITION = "transition"
 
-# Sound reactions (ИСПРАВЛЕНО по прошивке)
-SOUND_REACTIONS = {
-    1: "Яркость",    # GL_REACT_BRI
-    2: "Масштаб",    # GL_REACT_SCL
-    3: "Длина"       # GL_REACT_LEN
+# Поля пресета в сервисах -> ключи структуры Preset
+PRESET_SERVICE_FIELDS = {
+    "effect": "effect",
+    "fade_bright": "fadeBright",
+    "bright": "bright",
+    "adv_mode": "advMode",
+    "sound_react": "soundReact",
+    "min": "min",
+    "max": "max",
+    "speed": "speed",
+    "palette": "palette",
+    "scale": "scale",
+    "from_center": "fromCenter",
+    "color": "color",
+    "from_pal": "fromPal",
 }
-
-# Change periods
-CHANGE_PERIODS = {
-    1: "1 мин",
-    5: "5 мин", 
-    10: "10 мин",
-    15: "15 мин",
-    25: "25 мин", 
-    30: "30 мин",
-    40: "40 мин",
-    50: "50 мин",
-    60: "60 мин"
-}
-
-# ADC Modes (ИСПРАВЛЕНО по прошивке)
-ADC_MODES = {
-    1: "Выкл",       # GL_ADC_NONE
-    2: "Яркость",    # GL_ADC_BRI
-    3: "Музыка",     # GL_ADC_MIC
-    4: "Оба"         # GL_ADC_BOTH
-}
-
-# Lamp types
-LAMP_TYPES = {
-    1: "Лента",
-    2: "Зигзаг",
-    3: "Спираль"
-}
\ No newline at end of file
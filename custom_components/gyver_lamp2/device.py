@@ -3,21 +3,107 @@ from __future__ import annotations
 import logging
 import socket
 import asyncio
-from typing import Any
+import time
+import zlib
+from contextlib import nullcontext
+from typing import Any, Callable
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN, DEFAULT_NAME, CONF_NAME, EFFECTS, PALETTES
+from .const import (
+    DOMAIN,
+    DEFAULT_NAME,
+    CONF_NAME,
+    EFFECTS,
+    PALETTES,
+    MODE_CONTROL,
+    MODE_SETTINGS,
+    MODE_PRESETS,
+    CMD_ON,
+    CMD_OFF,
+    CMD_SELECT_PRESET,
+    CMD_PREV_PRESET,
+    CMD_NEXT_PRESET,
+    CONF_ENABLE_METRICS,
+    DEFAULT_ENABLE_METRICS,
+    CONF_ENABLE_TRACING,
+    DEFAULT_ENABLE_TRACING,
+    CONF_TRACE_BUFFER_SIZE,
+    DEFAULT_TRACE_BUFFER_SIZE,
+    CONF_ONLINE_TIMEOUT,
+    DEFAULT_ONLINE_TIMEOUT,
+    CONF_JOURNAL_SIZE,
+    DEFAULT_JOURNAL_SIZE,
+    CMD_REBOOT,
+    MAX_PRESETS,
+    CONF_MAX_FRAME_SIZE,
+    DEFAULT_MAX_FRAME_SIZE,
+    CONF_REFUSE_OVERSIZED,
+    DEFAULT_REFUSE_OVERSIZED,
+)
+from .bank import FORMAT_TEXT, encode_bank
+from .fleet import current_batch
+from .journal import (
+    GyverLamp2Journal,
+    frame_slot,
+    SLOT_SETTINGS,
+    SLOT_PRESETS,
+    SLOT_SELECT,
+    SLOT_POWER,
+    SLOTS_ORDER,
+)
+from .liveness import GyverLamp2Liveness, STATUS_ONLINE, STATUS_OFFLINE
+from .metrics import GyverLamp2Metrics
+from .playlist import GyverLamp2Playlist
+from .protocol import (
+    DEFAULT_PRESET,
+    DEFAULT_SETTINGS,
+    PRESET_KEYS,
+    broadcast_ip,
+    build_command,
+    build_presets_frame,
+    build_settings_frame,
+    calculate_port,
+    open_socket,
+    send_frame,
+)
+from .rotation import GyverLamp2Rotation
+from .stream import DEFAULT_STREAM_RATE, GyverLamp2Stream
+from .tracing import GyverLamp2Tracer, current_origin, origin_scope
+from .transition import GyverLamp2Transitions
 
 _LOGGER = logging.getLogger(__name__)
 
 STORAGE_VERSION = 1
 STORAGE_KEY = f"{DOMAIN}.storage"
 
+# Сколько ждать загрузки лампы после перезагрузки, прежде чем восстанавливать состояние
+REBOOT_REPLAY_DELAY = 10
+
+# Окно, в котором нажатия "следующий/предыдущий" копятся в один выбор пресета
+PRESET_STEP_DELAY = 0.4
+
+# Поля пресета, которые можно менять плавно
+PRESET_FADE_KEYS = ('bright', 'color')
+
+# Правки пресетов в режиме предпросмотра уходят на лампу не чаще, чем раз в это время
+PREVIEW_UPLOAD_DELAY = 0.2
+
+# Отпечатки отправленных кадров пишутся с задержкой, чтобы не писать на каждый кадр
+FINGERPRINTS_SAVE_DELAY = 5
+
+def frame_fingerprint(cmd: str) -> int:
+    """Get fingerprint of a frame."""
+    return zlib.crc32(cmd.encode())
+
+# Пустой контекст, когда трассировка выключена
+_NO_TRACE = nullcontext()
+
 class GyverLamp2Device:
     """Main device class."""
     
@@ -28,20 +114,139 @@ class GyverLamp2Device:
         
         # Инициализация хранилища
         self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}_{entry.entry_id}")
+        # Что лампа уже получила: отпечатки последних GL,1 и GL,2 и выбранный пресет
+        self._sent_store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}_{entry.entry_id}_sent")
+        self._fingerprints = {}
+        self._fingerprints_dirty = False
+        # Состояние и отпечатки остальных групп: у каждой группы свои лампы и свой банк
+        self._partitions = {}
+        self._group_fingerprints = {}
         
         # Инициализация данных
         self._settings = self._get_default_settings()
         self._presets = [self._create_default_preset(1)]
         self._current_preset = 1
         self._current_group = self.config["group_number"]
+        self._is_on = False
+        
+        # Ревизия банка пресетов и кэш подписей для списка выбора
+        self._presets_revision = 0
+        self._preset_labels = []
+        self._preset_options = []
+        self._preset_options_revision = -1
+        
+        # Размер кадра GL,2 и бюджет на него
+        self._bank_size = 0
+        self._bank_size_key = None
+        self._oversize_warned = None
+        self._max_frame_size = entry.options.get(CONF_MAX_FRAME_SIZE, DEFAULT_MAX_FRAME_SIZE)
+        self._refuse_oversized = entry.options.get(CONF_REFUSE_OVERSIZED, DEFAULT_REFUSE_OVERSIZED)
         
         self._last_command = None
         self._listeners = []
+        # Сущности полей текущего пресета: только их обновляет загрузка предпросмотра
+        self._preset_listeners = []
+        # Вызываются один раз при выгрузке записи
+        self._stop_listeners = []
+        # Растет при каждом оповещении слушателей, по ней клиенты замечают пропуски
+        self._revision = 0
+        # Один UDP сокет на все кадры лампы вместо нового на каждый кадр
+        self._sock = None
+        # После выгрузки записи задачи, уже ждущие отправки, кадров не шлют
+        self._stopped = False
+        
+        # Метрики собираются только если включены в настройках интеграции
+        self.metrics = None
+        if entry.options.get(CONF_ENABLE_METRICS, DEFAULT_ENABLE_METRICS):
+            self.metrics = GyverLamp2Metrics()
+        
+        self.tracer = None
+        if entry.options.get(CONF_ENABLE_TRACING, DEFAULT_ENABLE_TRACING):
+            self.tracer = GyverLamp2Tracer(
+                entry.options.get(CONF_TRACE_BUFFER_SIZE, DEFAULT_TRACE_BUFFER_SIZE)
+            )
+        
+        # Отслеживание онлайн-статуса по входящему трафику ламп
+        self.liveness = None
+        online_timeout = entry.options.get(CONF_ONLINE_TIMEOUT, DEFAULT_ONLINE_TIMEOUT)
+        if online_timeout > 0:
+            self.liveness = GyverLamp2Liveness(hass, online_timeout, self._handle_online_change)
+        # Команды, отложенные пока лампа офлайн: по одной на слот состояния
+        self._backlog = {}
+        
+        self.transitions = GyverLamp2Transitions(hass)
+        
+        self.journal = GyverLamp2Journal(
+            entry.options.get(CONF_JOURNAL_SIZE, DEFAULT_JOURNAL_SIZE)
+        )
+        self._unsub_reboot_replay = None
+        
+        # Отложенная отправка выбора пресета после листания
+        self._unsub_preset_step = None
+        self._preset_step_origin = None
+        
+        # Модель автосмены пресетов: лампа листает их сама, не сообщая об этом
+        self.rotation = GyverLamp2Rotation(hass, self._handle_rotation)
+        self._preset_known = True
+        
+        self.playlist = GyverLamp2Playlist(hass, self._async_playlist_select)
+        self._stored_playlist = None
+        
+        # Поток цвета и яркости от внешних источников, мимо хранилища и слушателей
+        self.stream = GyverLamp2Stream(hass, self._async_send_stream_frame, self._async_restore_after_stream)
+        
+        # Предпросмотр: сохраненный банк, пока правки живут только в памяти
+        self._preview_saved = None
+        self._unsub_preview_upload = None
+        
+        self._device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name=self.config.get(CONF_NAME, DEFAULT_NAME),
+            manufacturer="Gyver",
+            model="Gyver Lamp 2"
+        )
         
         # Calculate initial port
         self.port = self._calculate_port()
         self.ip = self._get_broadcast_ip()
     
+    async def async_start(self):
+        """Start background tracking."""
+        self._configure_rotation_from_lamp()
+        self.playlist.restore(self._stored_playlist)
+        if self.liveness is not None:
+            await self.liveness.async_start(self.port)
+        self.hass.async_create_task(self.async_reconcile())
+    
+    def async_stop(self):
+        """Stop background tracking and drop listeners."""
+        self._stopped = True
+        self._listeners.clear()
+        self._preset_listeners.clear()
+        stop_listeners, self._stop_listeners = self._stop_listeners, []
+        for listener in stop_listeners:
+            listener()
+        self.transitions.cancel_all()
+        self.stream.stop()
+        self.rotation.shutdown()
+        self.playlist.pause()
+        if self._unsub_reboot_replay is not None:
+            self._unsub_reboot_replay()
+            self._unsub_reboot_replay = None
+        if self._unsub_preset_step is not None:
+            self._unsub_preset_step()
+            self._unsub_preset_step = None
+        if self._unsub_preview_upload is not None:
+            # Несохраненный предпросмотр пропадает, при запуске лампа получит сохраненный банк
+            self._unsub_preview_upload()
+            self._unsub_preview_upload = None
+        if self.liveness is not None:
+            self.liveness.stop()
+        self._close_socket()
+        if self._fingerprints_dirty:
+            # Записываем сразу, чтобы перезапущенная запись прочитала свежие отпечатки
+            self.hass.async_create_task(self._sent_store.async_save(self._fingerprints_data()))
+    
     async def async_load_settings(self):
         """Load settings from storage."""
         try:
@@ -49,8 +254,19 @@ class GyverLamp2Device:
             if data:
                 self._settings = data.get('settings', self._get_default_settings())
                 self._presets = data.get('presets', [self._create_default_preset(1)])
+                self._presets_changed()
                 self._current_preset = data.get('current_preset', 1)
                 self._current_group = data.get('current_group', self.config["group_number"])
+                self._stored_playlist = data.get('playlist')
+                self._partitions = {int(group): state for group, state in data.get('groups', {}).items()}
+                sent = await self._sent_store.async_load() or {}
+                if 'groups' in sent:
+                    fingerprints = {int(group): state for group, state in sent['groups'].items()}
+                    self._fingerprints = fingerprints.pop(self._current_group, {})
+                    self._group_fingerprints = fingerprints
+                else:
+                    # Старый формат: отпечатки только текущей группы
+                    self._fingerprints = sent
                 _LOGGER.debug("Settings loaded from storage")
             else:
                 await self._async_save_settings()
@@ -64,100 +280,244 @@ class GyverLamp2Device:
         try:
             data = {
                 'settings': self._settings,
-                'presets': self._presets,
+                # Во время предпросмотра в хранилище остается сохраненный банк
+                'presets': self._presets if self._preview_saved is None else self._preview_saved,
                 'current_preset': self._current_preset,
-                'current_group': self._current_group
+                'current_group': self._current_group,
+                'playlist': self.playlist.as_dict(),
+                'groups': {str(group): state for group, state in self._partitions.items()},
             }
-            await self._store.async_save(data)
+            started = time.perf_counter()
+            with self._span("save"):
+                await self._store.async_save(data)
+            if self.metrics is not None:
+                self.metrics.record_storage_write((time.perf_counter() - started) * 1000)
             _LOGGER.debug("Settings saved to storage")
         except Exception as e:
             _LOGGER.error(f"Error saving settings to storage: {e}")
     
+    def _note_frame_delivered(self, cmd: str, mode: int):
+        """Remember what the lamp holds after a frame reached it."""
+        if mode == MODE_SETTINGS:
+            self._fingerprints['settings'] = frame_fingerprint(cmd)
+        elif mode == MODE_PRESETS:
+            # Номер текущего пресета в конце кадра храним отдельно: его меняет и GL,0,6
+            body, current = cmd.rsplit(',', 1)
+            self._fingerprints['presets'] = frame_fingerprint(body)
+            self._fingerprints['preset'] = int(current)
+        elif mode == MODE_CONTROL:
+            parts = cmd.split(',')
+            if int(parts[2]) == CMD_SELECT_PRESET:
+                self._fingerprints['preset'] = int(parts[3])
+            elif int(parts[2]) in (CMD_PREV_PRESET, CMD_NEXT_PRESET):
+                self._fingerprints.pop('preset', None)
+            else:
+                return
+        else:
+            return
+        self._fingerprints_dirty = True
+        self._sent_store.async_delay_save(self._fingerprints_data, FINGERPRINTS_SAVE_DELAY)
+    
+    def _configure_rotation_from_lamp(self):
+        """Model rotation only from settings the lamp is known to hold."""
+        settings_cmd = self._build_settings_command(self._settings)
+        if self._fingerprints.get('settings') == frame_fingerprint(settings_cmd):
+            self.rotation.configure(self._settings)
+        else:
+            # Сохраненный режим "Авто" мог не дойти до лампы - не моделируем смену пресетов
+            self.rotation.configure({})
+    
+    def _fingerprints_data(self) -> dict:
+        """Get fingerprints of all groups for the delayed save."""
+        self._fingerprints_dirty = False
+        groups = {**self._group_fingerprints, self._current_group: self._fingerprints}
+        return {'groups': {str(group): state for group, state in groups.items()}}
+    
+    async def async_reconcile(self):
+        """Resend at startup only the state the lamp does not hold yet."""
+        if not self._fingerprints:
+            # Неизвестно, что лампа уже получила - ничего не шлем, как и раньше
+            return
+        sent = []
+        settings_cmd = self._build_settings_command(self._settings)
+        if 'settings' in self._fingerprints and self._fingerprints['settings'] != frame_fingerprint(settings_cmd):
+            await self.send_settings_command(self._settings)
+            sent.append('settings')
+        presets_body = self._build_presets_command(self._presets).rsplit(',', 1)[0]
+        if 'presets' in self._fingerprints and self._fingerprints['presets'] != frame_fingerprint(presets_body):
+            await self.send_presets_command(self._presets)
+            sent.append('presets')
+        elif self._fingerprints.get('preset') != self._current_preset:
+            await self.send_command(MODE_CONTROL, CMD_SELECT_PRESET, self._current_preset)
+            sent.append('preset')
+        _LOGGER.debug(f"Startup reconciliation sent: {', '.join(sent) or 'nothing'}")
+    
     def _get_default_settings(self) -> dict:
         """Get default settings."""
-        return {
-            'brightness': 255,
-            'adc_mode': 1,
-            'min_brightness': 0,
-            'max_brightness': 255,
-            'mode_change': 0,
-            'random_order': 0,
-            'change_period': 1,
-            'lamp_type': 1,
-            'max_current': 500,
-            'work_hours_from': 0,
-            'work_hours_to': 23,
-            'matrix_orientation': 1,
-            'matrix_length': 16,
-            'matrix_width': 16,
-            'timezone': 'MSK',
-            'city_id': 0
-        }
+        return dict(DEFAULT_SETTINGS)
     
     def _create_default_preset(self, number: int) -> dict:
         """Create default preset configuration according to firmware structure."""
-        return {
-            'effect': 1,           # 0: effect - тип эффекта
-            'fadeBright': 0,       # 1: fadeBright - использовать свою яркость (0/1)
-            'bright': 255,         # 2: bright - яркость пресета
-            'advMode': 1,          # 3: advMode - тип реакции (1-5)
-            'soundReact': 1,       # 4: soundReact - реакция на звук (1-3)
-            'min': 0,              # 5: min - мин сигнал светомузыки
-            'max': 255,            # 6: max - макс сигнал светомузыки
-            'speed': 128,          # 7: speed - скорость эффекта
-            'palette': 1,          # 8: palette - палитра цветов
-            'scale': 255,          # 9: scale - масштаб эффекта
-            'fromCenter': 0,       # 10: fromCenter - эффект из центра (0/1)
-            'color': 0,            # 11: color - основной цвет
-            'fromPal': 0,          # 12: fromPal - использовать палитру (0=цвет, 1=палитра)
-            # number НЕ входит в структуру Preset для отправки!
-        }
+        # number НЕ входит в структуру Preset для отправки!
+        return dict(DEFAULT_PRESET)
     
     def _get_broadcast_ip(self) -> str:
         """Get broadcast IP."""
-        ip = self.config["ip_address"]
-        if ip.endswith("."):
-            return ip + "255"
-        else:
-            # Если введен полный IP, берем сеть и добавляем 255
-            parts = ip.split(".")
-            if len(parts) == 4:
-                return ".".join(parts[:3]) + ".255"
-            return ip
+        return broadcast_ip(self.config["ip_address"])
     
     def _calculate_port(self) -> int:
         """Calculate UDP port based on current group."""
-        port_num = 17
-        for char in self.config["network_key"]:
-            port_num *= ord(char)
-            port_num %= 65536
-        return (port_num % 15000) + 50000 + self._current_group
+        return calculate_port(self.config["network_key"], self._current_group)
     
     @property
     def device_info(self) -> DeviceInfo:
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.entry.entry_id)},
-            name=self.config.get(CONF_NAME, DEFAULT_NAME),
-            manufacturer="Gyver",
-            model="Gyver Lamp 2"
-        )
+        """Return device info, shared by all entities of the lamp."""
+        return self._device_info
     
     @property
     def last_command(self) -> str:
         """Get last sent command."""
         return self._last_command or "No command sent"
     
+    @property
+    def online_status(self) -> str:
+        """Get lamp online status."""
+        if self.liveness is None:
+            # Без отслеживания считаем лампу доступной
+            return "Online"
+        return self.liveness.status.capitalize()
+    
+    @property
+    def backlog_size(self) -> int:
+        """Get number of commands held while the lamp is offline."""
+        return len(self._backlog)
+    
+    @property
+    def runtime(self) -> dict:
+        """Get sizes of everything that grows with uptime, to spot leaks."""
+        return {
+            'listeners': len(self._listeners),
+            'transitions': len(self.transitions),
+            'backlog': len(self._backlog),
+            'journal': len(self.journal),
+            'traces': len(self.tracer) if self.tracer is not None else 0,
+            'fingerprints': len(self._fingerprints),
+            'group_partitions': len(self._partitions),
+            'socket_open': self._sock is not None,
+            'pending_timers': [
+                name for name, unsub in (
+                    ('reboot_replay', self._unsub_reboot_replay),
+                    ('preset_step', self._unsub_preset_step),
+                    ('preview_upload', self._unsub_preview_upload),
+                ) if unsub is not None
+            ],
+        }
+    
+    @property
+    def is_on(self) -> bool:
+        """Get last known power state."""
+        return self._is_on
+    
+    def note_power(self, is_on: bool):
+        """Set power state without sending a frame."""
+        if is_on != self._is_on:
+            self._is_on = is_on
+            self._notify_listeners()
+    
+    def note_group_power(self, is_on: bool):
+        """Apply power state sent to the whole group by another member."""
+        # Кадр уже дошел до этой лампы, записываем его как свой для восстановления
+        cmd = f"GL,{MODE_CONTROL},{CMD_ON if is_on else CMD_OFF}"
+        self.journal.record(MODE_CONTROL, cmd.encode(), current_origin())
+        self.note_power(is_on)
+    
     @property
     def current_preset(self) -> int:
         """Get current preset number."""
         return self._current_preset
     
+    @property
+    def current_preset_known(self) -> bool:
+        """Check if the current preset is known, which is not the case after a random change."""
+        return self._preset_known
+    
+    def _handle_rotation(self, random_order: bool):
+        """Follow a modeled automatic preset change."""
+        if random_order:
+            self._preset_known = False
+        else:
+            self._current_preset = self._current_preset % len(self._presets) + 1
+        self._notify_listeners()
+    
+    async def start_playlist(
+        self, steps: list[tuple[int, int]], random_order: bool = False, hours: tuple[int, int] | None = None
+    ) -> bool:
+        """Start switching presets by schedule."""
+        if not steps or any(not 1 <= preset <= len(self._presets) for preset, _ in steps):
+            _LOGGER.warning(f"Playlist refers to presets outside 1-{len(self._presets)}")
+            return False
+        self.playlist.start(steps, random_order, hours)
+        await self._async_save_settings()
+        self._notify_listeners()
+        return True
+    
+    async def stop_playlist(self):
+        """Stop switching presets by schedule."""
+        self.playlist.stop()
+        await self._async_save_settings()
+        self._notify_listeners()
+    
+    async def _async_playlist_select(self, preset_number: int):
+        """Select a playlist step's preset on the lamp."""
+        if not 1 <= preset_number <= len(self._presets):
+            _LOGGER.warning(f"Playlist preset #{preset_number} no longer exists, skipping")
+            return
+        with self.trace_command("playlist"):
+            await self.send_command(MODE_CONTROL, CMD_SELECT_PRESET, preset_number)
+    
+    def _preset_anchored(self):
+        """Restart the rotation model after the lamp got an explicit preset."""
+        self._preset_known = True
+        self.rotation.restart()
+    
     @property
     def presets(self) -> list:
         """Get list of presets."""
         return self._presets
     
+    @property
+    def presets_revision(self) -> int:
+        """Get revision of the preset bank, bumped on every change."""
+        return self._presets_revision
+    
+    @property
+    def preset_options(self) -> list:
+        """Get preset option labels, recomputing only changed entries."""
+        if self._preset_options_revision != self._presets_revision:
+            labels = self._preset_labels
+            del labels[len(self._presets):]
+            for index, preset in enumerate(self._presets):
+                key = (preset.get('effect', 1), preset.get('palette', 1))
+                if index < len(labels) and labels[index][0] == key:
+                    continue
+                label = f"{index + 1}. {self.get_preset_name(index + 1)}"
+                if index < len(labels):
+                    labels[index] = (key, label)
+                else:
+                    labels.append((key, label))
+            self._preset_options = [label for _, label in labels]
+            self._preset_options_revision = self._presets_revision
+        return self._preset_options
+    
+    @property
+    def bank_size(self) -> int:
+        """Get size of the preset bank upload in bytes."""
+        key = (self._presets_revision, self._current_preset)
+        if self._bank_size_key != key:
+            self._bank_size = self.presets_frame_size(self._presets)
+            self._bank_size_key = key
+        return self._bank_size
+    
     @property
     def current_preset_config(self) -> dict:
         """Get current preset configuration."""
@@ -177,11 +537,164 @@ class GyverLamp2Device:
     
     async def update_current_preset(self, updates: dict):
         """Update current preset and send command."""
-        if 1 <= self._current_preset <= len(self._presets):
-            self._presets[self._current_preset - 1].update(updates)
-            await self._async_save_settings()
+        await self.update_preset(self._current_preset, updates)
+    
+    async def update_preset(self, preset_number: int, updates: dict) -> bool:
+        """Update any preset in the bank without switching the lamp to it."""
+        if not 1 <= preset_number <= len(self._presets):
+            _LOGGER.warning(f"Preset #{preset_number} does not exist")
+            return False
+        candidate = list(self._presets)
+        candidate[preset_number - 1] = {**candidate[preset_number - 1], **updates}
+        if not self._bank_fits(candidate):
+            return False
+        self._presets[preset_number - 1].update(updates)
+        self._presets_changed()
+        if self._preview_saved is not None:
+            self._schedule_preview_upload()
+            return True
+        await self._async_save_settings()
+        await self.send_presets_command(self._presets)
+        self._notify_listeners()
+        return True
+    
+    @property
+    def preview_active(self) -> bool:
+        """Check if preset edits are previewed without saving."""
+        return self._preview_saved is not None
+    
+    def start_preview(self):
+        """Start previewing preset edits on the lamp without saving them."""
+        if self._preview_saved is None:
+            self._preview_saved = [preset.copy() for preset in self._presets]
+    
+    async def commit_preview(self) -> bool:
+        """Keep previewed edits with one save."""
+        if self._preview_saved is None:
+            return False
+        await self._async_flush_preview_upload()
+        self._preview_saved = None
+        await self._async_save_settings()
+        # Остальные слушатели видят правки предпросмотра только теперь, одним оповещением
+        self._notify_listeners()
+        return True
+    
+    async def revert_preview(self) -> bool:
+        """Drop previewed edits with one upload of the saved bank."""
+        if self._preview_saved is None:
+            return False
+        for key in PRESET_KEYS:
+            self.transitions.cancel(f"preset_{key}")
+        if self._unsub_preview_upload is not None:
+            self._unsub_preview_upload()
+            self._unsub_preview_upload = None
+        self._presets = self._preview_saved
+        self._preview_saved = None
+        self._presets_changed()
+        await self.send_presets_command(self._presets)
+        self._notify_listeners()
+        return True
+    
+    def start_stream(self, rate: int = DEFAULT_STREAM_RATE) -> bool:
+        """Start streaming color and brightness samples to the lamp."""
+        if self._preview_blocks():
+            return False
+        preset = self.current_preset_config
+        self.stream.start(
+            {'color': preset.get('color', 0), 'brightness': self._settings.get('brightness', 255)},
+            rate,
+        )
+        # Лампа держит не свой банк: если HA упадет посреди потока, при запуске банк уйдет заново
+        self._fingerprints['presets'] = 0
+        self._fingerprints_dirty = True
+        self._sent_store.async_delay_save(self._fingerprints_data, FINGERPRINTS_SAVE_DELAY)
+        return True
+    
+    def push_stream_sample(self, color: int = None, brightness: int = None):
+        """Take a color/brightness sample; only the latest one is sent."""
+        self.stream.push(color=color, brightness=brightness)
+    
+    async def stop_stream(self) -> dict | None:
+        """Stop streaming and restore the real preset bank, returning stream stats."""
+        if not self.stream.stop():
+            return None
+        await self._async_restore_after_stream()
+        return self.stream.as_dict()
+    
+    async def _async_send_stream_frame(self, values: dict) -> bool:
+        """Send one sample as a single-preset GL,2 frame, returning False if it was dropped."""
+        # Свой цвет вместо палитры и своя яркость пресета: цвет и яркость в одном коротком кадре
+        preset = {
+            **self.current_preset_config,
+            'color': values['color'],
+            'fromPal': 0,
+            'fadeBright': 1,
+            'bright': values['brightness'],
+        }
+        cmd = build_presets_frame([preset], 1)
+        if self._stopped:
+            return False
+        if self.liveness is not None:
+            if self.liveness.status == STATUS_OFFLINE:
+                # Устаревший сэмпл не копим: придет следующий
+                return False
+            self.liveness.note_sent(cmd)
+        submitted = time.perf_counter()
+        try:
+            started = await self.hass.async_add_executor_job(
+                self._send_udp_command_timed, cmd, self.ip, self.port, self._get_socket()
+            )
+        except OSError:
+            # Как и для обычных кадров: следующий сэмпл откроет новый сокет
+            self._close_socket()
+            if self.metrics is not None:
+                self.metrics.record_failure()
+            raise
+        if self.metrics is not None:
+            finished = time.perf_counter()
+            self.metrics.record_send(
+                MODE_PRESETS, len(cmd), (started - submitted) * 1000, (finished - submitted) * 1000
+            )
+        return True
+    
+    async def _async_restore_after_stream(self):
+        """Give the lamp its real preset bank back."""
+        with self.trace_command("stream"):
             await self.send_presets_command(self._presets)
-            self._notify_listeners()
+    
+    def _preview_blocks(self) -> bool:
+        """Refuse structural bank changes while a preview is open."""
+        if self._preview_saved is None:
+            return False
+        _LOGGER.warning("Commit or revert the preset preview before changing the bank")
+        return True
+    
+    def _schedule_preview_upload(self):
+        """Upload previewed bank once per interval however many edits arrive."""
+        if self._unsub_preview_upload is None:
+            self._unsub_preview_upload = async_call_later(
+                self.hass, PREVIEW_UPLOAD_DELAY, self._async_preview_upload_due
+            )
+    
+    @callback
+    def _async_preview_upload_due(self, _now) -> None:
+        """Start the delayed preview upload."""
+        self._unsub_preview_upload = None
+        self.hass.async_create_task(self._async_send_preview())
+    
+    async def _async_flush_preview_upload(self):
+        """Send a pending preview upload right away."""
+        if self._unsub_preview_upload is not None:
+            self._unsub_preview_upload()
+            self._unsub_preview_upload = None
+            await self._async_send_preview()
+    
+    async def _async_send_preview(self):
+        """Send previewed bank and let preset field entities catch up once."""
+        with self.trace_command("preview"):
+            await self.send_presets_command(self._presets)
+        # Полное оповещение будет при фиксации или откате
+        self._notify_preset_listeners()
     
     async def set_setting(self, key: str, value):
         """Update a setting value."""
@@ -189,22 +702,113 @@ class GyverLamp2Device:
         await self._async_save_settings()
         self._notify_listeners()
     
+    async def set_brightness(self, brightness: int) -> bool:
+        """Set global brightness and send settings to the lamp."""
+        self.transitions.cancel('brightness')
+        self._settings['brightness'] = brightness
+        await self._async_save_settings()
+        sent = await self.send_settings_command(self._settings)
+        self._notify_listeners()
+        return sent
+    
+    def transition_brightness(self, target: int, duration: float, start: int = None, turn_off: bool = False):
+        """Fade global brightness with intermediate GL,1 frames."""
+        if start is None:
+            start = self.transitions.current('brightness', self._settings.get('brightness', 255))
+        
+        async def finish():
+            if turn_off:
+                await self.send_command(MODE_CONTROL, CMD_OFF)
+                # Возвращаем сохраненную яркость, чтобы лампа включилась с ней
+                await self.send_settings_command(self._settings)
+            else:
+                await self.set_brightness(target)
+        
+        self.transitions.start('brightness', start, target, duration, self.send_brightness_frame, finish)
+    
+    async def send_brightness_frame(self, brightness: int):
+        """Send intermediate brightness without saving or notifying."""
+        cmd = self._build_settings_command({**self._settings, 'brightness': brightness})
+        self._last_command = cmd
+        await self._async_send_frame(cmd, MODE_SETTINGS)
+    
+    def transition_preset_value(self, key: str, target: int, duration: float):
+        """Fade a field of the current preset with intermediate GL,2 frames."""
+        index = self._current_preset - 1
+        if not 0 <= index < len(self._presets):
+            return
+        transition_key = f"preset_{key}"
+        start = self.transitions.current(transition_key, self._presets[index].get(key, 0))
+        
+        async def send_step(value: int):
+            presets = list(self._presets)
+            # Идущие одновременно затухания других полей не откатываются этим кадром
+            preset = {
+                name: self.transitions.current(f"preset_{name}", item)
+                for name, item in presets[index].items()
+            }
+            preset[key] = value
+            presets[index] = preset
+            cmd = self._build_presets_command(presets)
+            self._last_command = cmd
+            await self._async_send_frame(cmd, MODE_PRESETS)
+        
+        async def finish():
+            await self.update_preset(index + 1, {key: target})
+        
+        self.transitions.start(transition_key, start, target, duration, send_step, finish)
+    
     async def set_current_preset(self, preset_number: int):
         """Set current preset number and notify listeners."""
-        if 1 <= preset_number <= len(self._presets):
-            self._current_preset = preset_number
-            await self._async_save_settings()
+        if await self._async_store_current_preset(preset_number):
             self._notify_listeners()
     
+    async def _async_store_current_preset(self, preset_number: int) -> bool:
+        """Set and save current preset number without notifying listeners."""
+        if not 1 <= preset_number <= len(self._presets):
+            return False
+        self._current_preset = preset_number
+        self._preset_anchored()
+        await self._async_save_settings()
+        return True
+    
+    def step_preset(self, step: int):
+        """Move to a neighbouring preset, coalescing rapid presses into one select."""
+        self._current_preset = (self._current_preset - 1 + step) % len(self._presets) + 1
+        self._preset_step_origin = current_origin()
+        if self._unsub_preset_step is not None:
+            self._unsub_preset_step()
+        self._unsub_preset_step = async_call_later(
+            self.hass, PRESET_STEP_DELAY, self._async_flush_preset_step
+        )
+        # Интерфейс сразу показывает целевой пресет, лампа получит его одним кадром
+        self._notify_listeners()
+    
+    @callback
+    def _async_flush_preset_step(self, _now) -> None:
+        """Send the preset reached by stepping."""
+        self._unsub_preset_step = None
+        self.hass.async_create_task(self._async_send_preset_step())
+    
+    async def _async_send_preset_step(self):
+        """Select the stepped-to preset on the lamp."""
+        with self.trace_command(self._preset_step_origin or "preset_step"):
+            await self.send_command(MODE_CONTROL, CMD_SELECT_PRESET, self._current_preset)
+    
     async def add_preset(self):
         """Add a new preset with current settings."""
-        if len(self._presets) < 40:  # MAX_PRESETS из прошивки = 40
+        if self._preview_blocks():
+            return
+        if len(self._presets) < MAX_PRESETS:
             # Создаем новый пресет на основе текущего
             new_preset = self.current_preset_config.copy()
             new_preset_number = len(self._presets) + 1
+            if not self._bank_fits(self._presets + [new_preset]):
+                return
             
             # Добавляем новый пресет в массив
             self._presets.append(new_preset)
+            self._presets_changed()
             
             # Переключаемся на новый пресet
             self._current_preset = new_preset_number
@@ -216,13 +820,16 @@ class GyverLamp2Device:
             
             _LOGGER.debug(f"Added new preset #{new_preset_number}, total presets: {len(self._presets)}")
         else:
-            _LOGGER.warning("Maximum number of presets (40) reached")
+            _LOGGER.warning(f"Maximum number of presets ({MAX_PRESETS}) reached")
     
     async def delete_last_preset(self):
         """Delete last preset."""
+        if self._preview_blocks():
+            return
         if len(self._presets) > 1:
             deleted_number = len(self._presets)
             self._presets.pop()
+            self._presets_changed()
             
             # Если удалили текущий пресет, переключаемся на предыдущий
             if self._current_preset > len(self._presets):
@@ -238,14 +845,135 @@ class GyverLamp2Device:
     
     async def reset_presets(self):
         """Reset all presets to one default."""
+        if self._preview_blocks():
+            return
         self._presets = [self._create_default_preset(1)]
         self._current_preset = 1
+        self._presets_changed()
         await self._async_save_settings()
         await self.send_presets_command(self._presets)
         self._notify_listeners()
         
         _LOGGER.debug("Reset all presets to default")
     
+    async def insert_preset(self, preset_number: int, updates: dict = None) -> bool:
+        """Insert a default preset at the given position."""
+        if len(self._presets) >= MAX_PRESETS:
+            _LOGGER.warning(f"Maximum number of presets ({MAX_PRESETS}) reached")
+            return False
+        if not 1 <= preset_number <= len(self._presets) + 1:
+            _LOGGER.warning(f"Cannot insert preset at #{preset_number}")
+            return False
+        preset = self._create_default_preset(preset_number)
+        preset.update(updates or {})
+        presets = list(self._presets)
+        presets.insert(preset_number - 1, preset)
+        return await self._async_commit_presets(presets)
+    
+    async def delete_preset(self, preset_number: int) -> bool:
+        """Delete preset at the given position."""
+        if len(self._presets) <= 1:
+            _LOGGER.warning("Cannot delete the last preset")
+            return False
+        if not 1 <= preset_number <= len(self._presets):
+            _LOGGER.warning(f"Preset #{preset_number} does not exist")
+            return False
+        presets = list(self._presets)
+        del presets[preset_number - 1]
+        return await self._async_commit_presets(presets)
+    
+    async def move_preset(self, preset_number: int, to_number: int) -> bool:
+        """Move preset to another position."""
+        count = len(self._presets)
+        if not (1 <= preset_number <= count and 1 <= to_number <= count):
+            _LOGGER.warning(f"Cannot move preset #{preset_number} to #{to_number}")
+            return False
+        presets = list(self._presets)
+        presets.insert(to_number - 1, presets.pop(preset_number - 1))
+        return await self._async_commit_presets(presets)
+    
+    async def swap_presets(self, preset_number: int, other_number: int) -> bool:
+        """Swap two presets."""
+        count = len(self._presets)
+        if not (1 <= preset_number <= count and 1 <= other_number <= count):
+            _LOGGER.warning(f"Cannot swap presets #{preset_number} and #{other_number}")
+            return False
+        presets = list(self._presets)
+        presets[preset_number - 1], presets[other_number - 1] = presets[other_number - 1], presets[preset_number - 1]
+        return await self._async_commit_presets(presets)
+    
+    async def duplicate_presets(self, preset_number: int, count: int = 1) -> bool:
+        """Insert copies of a range of presets right after the range."""
+        last = preset_number + count - 1
+        if count < 1 or not (1 <= preset_number and last <= len(self._presets)):
+            _LOGGER.warning(f"Cannot duplicate {count} presets from #{preset_number}")
+            return False
+        if len(self._presets) + count > MAX_PRESETS:
+            _LOGGER.warning(f"Maximum number of presets ({MAX_PRESETS}) reached")
+            return False
+        presets = list(self._presets)
+        presets[last:last] = [preset.copy() for preset in self._presets[preset_number - 1:last]]
+        return await self._async_commit_presets(presets)
+    
+    def export_presets(self, fmt: str = FORMAT_TEXT):
+        """Export preset bank; text is the GL,2 frame itself."""
+        if fmt == FORMAT_TEXT:
+            return self._build_presets_command(self._presets)
+        return encode_bank(self._presets, self._current_preset, fmt)
+    
+    async def import_presets(self, presets: list, current_preset: int) -> bool:
+        """Replace the whole bank with a validated one."""
+        return await self._async_commit_presets(
+            [preset.copy() for preset in presets], current_preset
+        )
+    
+    async def _async_commit_presets(self, presets: list, current_preset: int = None) -> bool:
+        """Replace preset bank with one save and one upload, keeping the current preset unless given."""
+        if self._preview_blocks() or not self._bank_fits(presets):
+            return False
+        
+        if current_preset is not None:
+            self._current_preset = current_preset
+        else:
+            current = None
+            if 1 <= self._current_preset <= len(self._presets):
+                current = self._presets[self._current_preset - 1]
+            
+            # Текущий пресет ищем по объекту, чтобы он остался тем же после перестановки
+            for index, preset in enumerate(presets):
+                if preset is current:
+                    self._current_preset = index + 1
+                    break
+            else:
+                self._current_preset = max(1, min(self._current_preset, len(presets)))
+        
+        self._presets = presets
+        self._presets_changed()
+        await self._async_save_settings()
+        await self.send_presets_command(self._presets)
+        self._notify_listeners()
+        return True
+    
+    def presets_frame_size(self, presets: list) -> int:
+        """Get size of the GL,2 frame for a preset bank in bytes."""
+        return len(self._build_presets_command(presets))
+    
+    def _bank_fits(self, presets: list) -> bool:
+        """Check a bank against the frame size budget before applying it."""
+        if not self._refuse_oversized:
+            return True
+        size = self.presets_frame_size(presets)
+        if size > self._max_frame_size:
+            _LOGGER.error(
+                f"Preset bank would be {size} bytes, over the {self._max_frame_size} byte limit"
+            )
+            return False
+        return True
+    
+    def _presets_changed(self):
+        """Mark preset bank as changed."""
+        self._presets_revision += 1
+    
     def get_preset_name(self, preset_number: int) -> str:
         """Get preset name in format Effect-Palette."""
         if 1 <= preset_number <= len(self._presets):
@@ -257,143 +985,349 @@ class GyverLamp2Device:
             return f"{effect_name}-{palette_name}"
         return "Пустой"
     
+    @property
+    def stored_groups(self) -> list[int]:
+        """Get groups with their own saved state, the current one included."""
+        return sorted([*self._partitions, self._current_group])
+    
     async def set_current_group(self, group_number: int):
-        """Set current group and recalculate port."""
+        """Switch to another group, swapping in its own settings and preset bank."""
+        if group_number == self._current_group or self._preview_blocks():
+            return
+        self.transitions.cancel_all()
+        if self._unsub_preset_step is not None:
+            self._unsub_preset_step()
+            self._unsub_preset_step = None
+        
+        self._partitions[self._current_group] = {
+            'settings': self._settings,
+            'presets': self._presets,
+            'current_preset': self._current_preset,
+        }
+        self._group_fingerprints[self._current_group] = self._fingerprints
+        partition = self._partitions.pop(group_number, None)
+        if partition is None:
+            # Группа еще не настраивалась - начинаем с копии текущего состояния
+            partition = {
+                'settings': dict(self._settings),
+                'presets': [preset.copy() for preset in self._presets],
+                'current_preset': self._current_preset,
+            }
+        self._settings = partition['settings']
+        self._presets = partition['presets']
+        self._current_preset = partition['current_preset']
+        self._fingerprints = self._group_fingerprints.pop(group_number, {})
+        self._presets_changed()
+        self._configure_rotation_from_lamp()
+        self._preset_anchored()
+        
         self._current_group = group_number
         self.port = self._calculate_port()
+        self._backlog.clear()
+        if self.liveness is not None:
+            await self.liveness.async_restart(self.port)
         await self._async_save_settings()
         self._notify_listeners()
+        # Лампы группы получают только то, чего у них еще нет
+        await self.async_reconcile()
+    
+    def trace_command(self, origin: str, context=None):
+        """Open a trace for a command started by an entity or service call."""
+        if self.tracer is None:
+            # Источник команды нужен журналу даже без трассировки
+            return origin_scope(origin)
+        return self.tracer.command(origin, context.id if context is not None else None)
     
-    def add_listener(self, listener):
-        """Add listener for state changes."""
+    def _span(self, name: str):
+        """Time a stage of the current command when tracing is enabled."""
+        if self.tracer is None:
+            return _NO_TRACE
+        return self.tracer.span(name)
+    
+    def add_listener(self, listener, preset_fields: bool = False) -> Callable[[], None]:
+        """Add listener for state changes, returning a callable that removes it."""
         self._listeners.append(listener)
+        if preset_fields:
+            self._preset_listeners.append(listener)
+        
+        def remove_listener():
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+            if listener in self._preset_listeners:
+                self._preset_listeners.remove(listener)
+        
+        return remove_listener
+    
+    def add_stop_listener(self, listener) -> Callable[[], None]:
+        """Add listener called when the entry unloads, returning a callable that removes it."""
+        self._stop_listeners.append(listener)
+        
+        def remove_listener():
+            if listener in self._stop_listeners:
+                self._stop_listeners.remove(listener)
+        
+        return remove_listener
+    
+    @property
+    def listeners_count(self) -> int:
+        """Get number of registered listeners."""
+        return len(self._listeners)
+    
+    @property
+    def revision(self) -> int:
+        """Get state revision, bumped on every listener notification."""
+        return self._revision
     
     def _notify_listeners(self):
         """Notify all listeners of state changes."""
-        for listener in self._listeners:
-            listener()
+        self._revision += 1
+        if self.metrics is not None:
+            self.metrics.record_fanout(len(self._listeners))
+        with self._span("notify"):
+            # Копия списка: слушатель может отписаться во время оповещения
+            for listener in tuple(self._listeners):
+                listener()
+    
+    def _notify_preset_listeners(self):
+        """Notify only entities showing fields of the current preset."""
+        if self.metrics is not None:
+            self.metrics.record_fanout(len(self._preset_listeners))
+        with self._span("notify"):
+            for listener in tuple(self._preset_listeners):
+                listener()
     
     async def send_command(self, mode: int, value: int, extra_value: int = None) -> bool:
         """Send UDP command."""
-        if extra_value is not None:
-            cmd = f"GL,{mode},{value},{extra_value}"
-        else:
-            cmd = f"GL,{mode},{value}"
+        cmd = build_command(mode, value, extra_value)
         
         self._last_command = cmd
         _LOGGER.debug(f"Sending command: {cmd} to {self.ip}:{self.port}")
         
         try:
-            # Асинхронная отправка
-            await self.hass.async_add_executor_job(
-                self._send_udp_command, cmd, self.ip, self.port
-            )
+            # Асинхронная отправка; отложенный офлайн кадр меняет состояние, но не считается отправленным
+            sent = await self._async_send_frame(cmd, mode)
             
-            # Обновление состояния
+            # Обновление состояния (слушатели оповещаются один раз ниже)
             if mode == 0:
                 if value == 6 and extra_value is not None:  # CMD_SELECT_PRESET
-                    await self.set_current_preset(extra_value)
+                    # Прямой выбор отменяет незавершенное листание
+                    if self._unsub_preset_step is not None:
+                        self._unsub_preset_step()
+                        self._unsub_preset_step = None
+                    await self._async_store_current_preset(extra_value)
                 elif value == 4:  # CMD_PREV_PRESET
                     new_preset = self._current_preset - 1
                     if new_preset < 1:
                         new_preset = len(self._presets)
-                    await self.set_current_preset(new_preset)
+                    await self._async_store_current_preset(new_preset)
                 elif value == 5:  # CMD_NEXT_PRESET
                     new_preset = self._current_preset + 1
                     if new_preset > len(self._presets):
                         new_preset = 1
-                    await self.set_current_preset(new_preset)
+                    await self._async_store_current_preset(new_preset)
+                elif value in (CMD_ON, CMD_OFF):
+                    self._is_on = value == CMD_ON
+                elif value == CMD_REBOOT:
+                    if self._unsub_reboot_replay is not None:
+                        self._unsub_reboot_replay()
+                    self._unsub_reboot_replay = async_call_later(
+                        self.hass, REBOOT_REPLAY_DELAY, self._async_replay_after_reboot
+                    )
             
             self._notify_listeners()
-            return True
+            return sent
         except Exception as e:
             _LOGGER.error(f"Command failed: {e}")
             return False
 
-    def _send_udp_command(self, cmd: str, ip: str, port: int):
-        """Sync UDP send."""
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            sock.sendto(cmd.encode(), (ip, port))
+    async def _async_send_frame(self, cmd: str, mode: int) -> bool:
+        """Send a frame in the executor, returning False if it was held or dropped."""
+        if self._stopped:
+            # Иначе сокет лампы откроется заново и уже не закроется
+            _LOGGER.debug(f"Entry unloaded, frame dropped: {cmd}")
+            return False
+        if self.liveness is not None:
+            if self.liveness.status == STATUS_OFFLINE:
+                self._hold_frame(cmd, mode)
+                return False
+            self.liveness.note_sent(cmd)
+        
+        sock = None
+        batch = current_batch()
+        if batch is not None:
+            if not batch.claim(self.ip, self.port, cmd):
+                # Кадр уже дошел до этой лампы от другой записи той же группы
+                self.journal.record(mode, cmd.encode(), current_origin())
+                self._note_frame_delivered(cmd, mode)
+                return True
+            sock = batch.sock
+        else:
+            sock = self._get_socket()
+        
+        try:
+            if self.metrics is None:
+                with self._span("send"):
+                    await self.hass.async_add_executor_job(
+                        self._send_udp_command, cmd, self.ip, self.port, sock
+                    )
+            else:
+                submitted = time.perf_counter()
+                try:
+                    with self._span("send"):
+                        started = await self.hass.async_add_executor_job(
+                            self._send_udp_command_timed, cmd, self.ip, self.port, sock
+                        )
+                except Exception:
+                    self.metrics.record_failure()
+                    raise
+                finished = time.perf_counter()
+                self.metrics.record_send(
+                    mode, len(cmd), (started - submitted) * 1000, (finished - submitted) * 1000
+                )
+        except OSError:
+            if batch is None:
+                # Сокет мог сломаться после смены сети - следующий кадр откроет новый
+                self._close_socket()
+            raise
+        
+        self.journal.record(mode, cmd.encode(), current_origin())
+        self._note_frame_delivered(cmd, mode)
+        return True
+
+    def _get_socket(self) -> socket.socket:
+        """Get the broadcast socket of the lamp, opening it on first use."""
+        if self._sock is None:
+            self._sock = open_socket()
+        return self._sock
+    
+    def _close_socket(self):
+        """Close the broadcast socket."""
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+    
+    def _hold_frame(self, cmd: str, mode: int):
+        """Keep the latest frame of each state slot while the lamp is offline."""
+        slot = frame_slot(cmd, mode)
+        if slot is None:
+            _LOGGER.debug(f"Lamp offline, dropping command: {cmd}")
+            return
+        self._backlog[slot] = cmd
+        _LOGGER.debug(f"Lamp offline, holding {slot} command")
+    
+    def _handle_online_change(self, status: str, previous: str):
+        """Handle lamp going online or offline."""
+        if status == STATUS_ONLINE and previous == STATUS_OFFLINE:
+            # Лампа могла перезагрузиться, пока была недоступна
+            self.hass.async_create_task(self.async_replay_state())
+        self._notify_listeners()
+    
+    @callback
+    def _async_replay_after_reboot(self, _now) -> None:
+        """Restore lamp state once it has rebooted."""
+        self._unsub_reboot_replay = None
+        self.hass.async_create_task(self.async_replay_state())
+    
+    async def async_replay_state(self):
+        """Send the minimal final lamp state in one burst."""
+        frames = self.journal.final_state()
+        
+        # Отложенные офлайн команды новее журнала; собираем их из текущего состояния
+        backlog, self._backlog = self._backlog, {}
+        if SLOT_SETTINGS in backlog:
+            frames[SLOT_SETTINGS] = self._build_settings_command(self._settings)
+        if SLOT_PRESETS in backlog:
+            frames[SLOT_PRESETS] = self._build_presets_command(self._presets)
+            frames.pop(SLOT_SELECT, None)
+        if SLOT_SELECT in backlog:
+            frames[SLOT_SELECT] = backlog[SLOT_SELECT]
+        if SLOT_POWER in backlog:
+            frames[SLOT_POWER] = backlog[SLOT_POWER]
+        
+        # Листание пресетов относительное - заменяем его прямым выбором
+        if SLOT_SELECT in frames:
+            frames[SLOT_SELECT] = f"GL,{MODE_CONTROL},{CMD_SELECT_PRESET},{self._current_preset}"
+        
+        _LOGGER.debug(f"Replaying {len(frames)} commands to restore lamp state")
+        for slot in SLOTS_ORDER:
+            if slot not in frames:
+                continue
+            cmd = frames[slot]
+            try:
+                sent = await self._async_send_frame(cmd, int(cmd.split(',')[1]))
+            except Exception as e:
+                _LOGGER.error(f"Replay command failed: {e}")
+                continue
+            if sent and slot == SLOT_SETTINGS and SLOT_SETTINGS in backlog:
+                # Отложенные настройки лампа получила только сейчас
+                self.rotation.configure(self._settings)
+    
+    def _send_udp_command_timed(self, cmd: str, ip: str, port: int, sock: socket.socket = None) -> float:
+        """Sync UDP send returning the moment the executor picked it up."""
+        started = time.perf_counter()
+        self._send_udp_command(cmd, ip, port, sock)
+        return started
+
+    def _send_udp_command(self, cmd: str, ip: str, port: int, sock: socket.socket = None):
+        """Sync UDP send, over a shared socket when given."""
+        send_frame(cmd, ip, port, sock)
     
     async def send_presets_command(self, presets_data: list) -> bool:
         """Send presets configuration command according to firmware structure."""
         if not presets_data:
             return False
             
-        # Build command: GL,2,<count>,<preset1_params(13)>,<preset2_params(13)>,...,<current_preset>
-        cmd_parts = ["GL", '2', str(len(presets_data))]
-        
-        for preset in presets_data:
-            # ПРАВИЛЬНЫЙ ПОРЯДОК ПАРАМЕТРОВ согласно структуре Preset (13 параметров):
-            cmd_parts.extend([
-                str(preset.get('effect', 1)),           # 0: effect
-                str(preset.get('fadeBright', 0)),       # 1: fadeBright
-                str(preset.get('bright', 255)),         # 2: bright
-                str(preset.get('advMode', 1)),          # 3: advMode
-                str(preset.get('soundReact', 1)),       # 4: soundReact
-                str(preset.get('min', 0)),              # 5: min
-                str(preset.get('max', 255)),            # 6: max
-                str(preset.get('speed', 128)),          # 7: speed
-                str(preset.get('palette', 1)),          # 8: palette
-                str(preset.get('scale', 255)),          # 9: scale
-                str(preset.get('fromCenter', 0)),       # 10: fromCenter
-                str(preset.get('color', 0)),            # 11: color
-                str(preset.get('fromPal', 0)),          # 12: fromPal
-            ])
-        
-        # Добавляем текущий пресет в конец команды (как в прошивке)
-        cmd_parts.append(str(self._current_preset))
-        
-        cmd = ','.join(cmd_parts)
+        with self._span("encode"):
+            cmd = self._build_presets_command(presets_data)
+        
+        size = len(cmd)
+        if size > self._max_frame_size:
+            if self._refuse_oversized:
+                _LOGGER.error(
+                    f"Presets command is {size} bytes, over the {self._max_frame_size} byte limit; not sent"
+                )
+                return False
+            if self._oversize_warned != self._presets_revision:
+                self._oversize_warned = self._presets_revision
+                _LOGGER.warning(
+                    f"Presets command is {size} bytes, over the {self._max_frame_size} byte limit; "
+                    "the lamp may not receive it"
+                )
         self._last_command = cmd
         
         _LOGGER.debug(f"Sending presets command: {cmd}")
         
         try:
-            await self.hass.async_add_executor_job(
-                self._send_udp_command, cmd, self.ip, self.port
-            )
+            if not await self._async_send_frame(cmd, MODE_PRESETS):
+                return False
             _LOGGER.debug(f"Sent presets command for {len(presets_data)} presets")
+            # GL,2 несет номер текущего пресета
+            self._preset_anchored()
             return True
         except Exception as e:
             _LOGGER.error(f"Presets command failed: {e}")
             return False
     
+    def _build_presets_command(self, presets_data: list) -> str:
+        """Build presets command string."""
+        return build_presets_frame(presets_data, self._current_preset)
+    
     async def send_settings_command(self, settings_data: dict) -> bool:
         """Send settings configuration command."""
-        timezone_map = {"MSK": 3, "UTC": 0, "EET": 2}
-        timezone_str = settings_data.get('timezone', 'MSK')
-        timezone_num = timezone_map.get(timezone_str.upper(), 3)
-        
-        cmd_parts = [
-            "GL", '1',
-            str(settings_data.get('brightness', 255)),
-            str(settings_data.get('adc_mode', 1)),
-            str(settings_data.get('min_brightness', 0)),
-            str(settings_data.get('max_brightness', 255)),
-            str(settings_data.get('mode_change', 0)),
-            str(settings_data.get('random_order', 0)),
-            str(settings_data.get('change_period', 1)),
-            str(settings_data.get('lamp_type', 1)),
-            str(int(settings_data.get('max_current', 500) / 100)),
-            str(settings_data.get('work_hours_from', 0)),
-            str(settings_data.get('work_hours_to', 23)),
-            str(settings_data.get('matrix_orientation', 1)),
-            str(settings_data.get('matrix_length', 16)),
-            str(settings_data.get('matrix_width', 16)),
-            str(timezone_num),
-            str(settings_data.get('city_id', 0))
-        ]
-        
-        cmd = ','.join(cmd_parts)
+        with self._span("encode"):
+            cmd = self._build_settings_command(settings_data)
         self._last_command = cmd
         
         try:
-            await self.hass.async_add_executor_job(
-                self._send_udp_command, cmd, self.ip, self.port
-            )
+            if not await self._async_send_frame(cmd, MODE_SETTINGS):
+                return False
+            if self.rotation.configure(settings_data):
+                self._preset_known = True
             return True
         except Exception as e:
             _LOGGER.error(f"Settings command failed: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def _build_settings_command(self, settings_data: dict) -> str:
+        """Build settings command string."""
+        return build_settings_frame(settings_data)
\ No newline at end of file
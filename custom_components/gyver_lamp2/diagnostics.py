@@ -0,0 +1,47 @@
+"""Diagnostics support for Gyver Lamp 2."""
+from __future__ import annotations
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_NETWORK_KEY
+from .device import GyverLamp2Device
+
+TO_REDACT = {CONF_NETWORK_KEY}
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    device: GyverLamp2Device = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "device": {
+            "ip": device.ip,
+            "port": device.port,
+            "current_group": device.current_group,
+            "stored_groups": device.stored_groups,
+            "current_preset": device.current_preset,
+            "current_preset_known": device.current_preset_known,
+            "preset_rotation": device.rotation.active,
+            "playlist": device.playlist.as_dict(),
+            "preview_active": device.preview_active,
+            "stream": device.stream.as_dict(),
+            "presets_count": len(device.presets),
+            "bank_size": device.bank_size,
+            "last_command": device.last_command,
+            "online_status": device.online_status,
+            "backlog_size": device.backlog_size,
+            "listeners": device.listeners_count,
+        },
+        "runtime": device.runtime,
+        "metrics": device.metrics.as_dict() if device.metrics is not None else None,
+        "traces": device.tracer.as_list() if device.tracer is not None else None,
+        "journal": device.journal.as_list(),
+    }
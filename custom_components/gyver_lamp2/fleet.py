@@ -0,0 +1,95 @@
+"""Applying one change to many lamps at once."""
+from __future__ import annotations
+import asyncio
+import logging
+import socket
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+
+from .protocol import open_socket
+
+_LOGGER = logging.getLogger(__name__)
+
+# Сколько ламп обрабатывается одновременно по умолчанию
+DEFAULT_PARALLEL = 8
+
+_BATCH: ContextVar[FleetBatch | None] = ContextVar("gyver_lamp2_fleet_batch", default=None)
+
+class FleetBatch:
+    """Shared socket and sent frames of one fleet apply."""
+
+    def __init__(self):
+        self._sock = None
+        self._sent: set[tuple[str, int, str]] = set()
+        self.deduplicated = 0
+        self.closed = False
+
+    @property
+    def sock(self) -> socket.socket:
+        """Get the socket shared by all sends of the batch."""
+        if self.closed:
+            raise RuntimeError("Fleet batch is closed")
+        if self._sock is None:
+            self._sock = open_socket()
+        return self._sock
+
+    def close(self):
+        """Close the shared socket; the batch is not used after that."""
+        self.closed = True
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def claim(self, ip: str, port: int, cmd: str) -> bool:
+        """Check if a frame still has to be sent to the address."""
+        key = (ip, port, cmd)
+        if key in self._sent:
+            # Лампы одной группы уже получили этот broadcast
+            self.deduplicated += 1
+            return False
+        self._sent.add(key)
+        return True
+
+def current_batch() -> FleetBatch | None:
+    """Get fleet apply the current command belongs to."""
+    batch = _BATCH.get()
+    # Таймеры, запущенные внутри пакета, копируют контекст и видят его после закрытия
+    if batch is None or batch.closed:
+        return None
+    return batch
+
+@contextmanager
+def fleet_batch():
+    """Share one socket and skip repeated frames for the commands inside."""
+    batch = FleetBatch()
+    token = _BATCH.set(batch)
+    try:
+        yield batch
+    finally:
+        _BATCH.reset(token)
+        batch.close()
+
+async def async_apply(items: list, apply: Callable[..., Awaitable[bool]], parallel: int = DEFAULT_PARALLEL) -> list[dict]:
+    """Run apply for every item with bounded parallelism, timing each one."""
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def run(item) -> dict:
+        async with semaphore:
+            started = time.perf_counter()
+            error = None
+            try:
+                success = await apply(item)
+            except Exception as e:
+                _LOGGER.error(f"Fleet apply failed: {e}")
+                success, error = False, str(e)
+            result = {
+                "success": bool(success),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            if error is not None:
+                result["error"] = error
+            return result
+
+    return await asyncio.gather(*(run(item) for item in items))
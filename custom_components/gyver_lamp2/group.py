@@ -0,0 +1,101 @@
+"""Lamps sharing one broadcast group."""
+from __future__ import annotations
+import logging
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .device import GyverLamp2Device
+
+_LOGGER = logging.getLogger(__name__)
+
+def group_key(device: GyverLamp2Device) -> tuple[str, int, str]:
+    """Get key of the broadcast group a device talks to."""
+    return (device.config["network_key"], device.current_group, device.ip)
+
+class GyverLamp2Groups:
+    """Keeps one group light per broadcast group with two or more lamps."""
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        # entry_id -> (async_add_entities, фабрика сущности)
+        self._platforms: dict[str, tuple[AddEntitiesCallback, Callable]] = {}
+        self._keys: dict[str, tuple] = {}
+        # ключ группы -> (entry_id владельца, сущность)
+        self._lights: dict[tuple, tuple[str, Entity]] = {}
+
+    def members(self, key: tuple) -> list[GyverLamp2Device]:
+        """Get loaded devices of a broadcast group."""
+        return [
+            device
+            for entry_id, device in self.hass.data.get(DOMAIN, {}).items()
+            if entry_id in self._platforms and group_key(device) == key
+        ]
+
+    @callback
+    def async_register(
+        self, device: GyverLamp2Device, add_entities: AddEntitiesCallback, create: Callable
+    ) -> Callable[[], None]:
+        """Register a light platform of a lamp, returning a callable that unregisters it."""
+        entry_id = device.entry.entry_id
+        self._platforms[entry_id] = (add_entities, create)
+        self._keys[entry_id] = group_key(device)
+        remove_listener = device.add_listener(lambda: self._handle_member_update(device))
+        self.async_refresh()
+
+        @callback
+        def unregister():
+            remove_listener()
+            self._platforms.pop(entry_id, None)
+            self._keys.pop(entry_id, None)
+            self.async_refresh()
+
+        return unregister
+
+    @callback
+    def _handle_member_update(self, device: GyverLamp2Device):
+        """Follow group changes of a member and refresh group light state."""
+        entry_id = device.entry.entry_id
+        key = group_key(device)
+        if self._keys.get(entry_id) != key:
+            self._keys[entry_id] = key
+            self.async_refresh()
+            return
+        owned = self._lights.get(key)
+        if owned is not None and owned[1].hass is not None:
+            owned[1].async_write_ha_state()
+
+    @callback
+    def async_refresh(self):
+        """Create, hand off or remove group lights after membership changes."""
+        groups: dict[tuple, list[str]] = {}
+        for entry_id, key in self._keys.items():
+            groups.setdefault(key, []).append(entry_id)
+
+        for key, (owner, light) in list(self._lights.items()):
+            members = groups.get(key, [])
+            if len(members) >= 2 and owner in members:
+                continue
+            del self._lights[key]
+            if owner in self._platforms and light.hass is not None:
+                # Владелец жив, но группа распалась или он из нее ушел
+                self.hass.async_create_task(light.async_remove())
+
+        for key, members in groups.items():
+            if len(members) < 2 or key in self._lights:
+                continue
+            # Сущность создает первый участник; при его выгрузке она переходит к следующему
+            owner = members[0]
+            add_entities, create = self._platforms[owner]
+            light = create(self, key)
+            self._lights[key] = (owner, light)
+            _LOGGER.debug(f"Group light for {key} owned by {owner}")
+            add_entities([light])
+
+        # Состав оставшихся групп мог измениться
+        for _, light in self._lights.values():
+            if light.hass is not None:
+                light.async_write_ha_state()
@@ -0,0 +1,68 @@
+"""Bounded journal of sent frames."""
+from __future__ import annotations
+import time
+from collections import deque
+
+from .const import MODE_CONTROL, MODE_SETTINGS, MODE_PRESETS, CMD_ON, CMD_OFF, CMD_PREV_PRESET, CMD_NEXT_PRESET, CMD_SELECT_PRESET
+
+# Слоты состояния лампы, которые можно восстановить повторной отправкой
+SLOT_SETTINGS = 'settings'
+SLOT_PRESETS = 'presets'
+SLOT_SELECT = 'select'
+SLOT_POWER = 'power'
+SLOTS_ORDER = (SLOT_SETTINGS, SLOT_PRESETS, SLOT_SELECT, SLOT_POWER)
+
+def frame_slot(cmd: str, mode: int) -> str | None:
+    """Get state slot a frame belongs to, or None if it is not replayable."""
+    if mode == MODE_SETTINGS:
+        return SLOT_SETTINGS
+    if mode == MODE_PRESETS:
+        return SLOT_PRESETS
+    if mode == MODE_CONTROL:
+        value = int(cmd.split(',')[2])
+        if value in (CMD_ON, CMD_OFF):
+            return SLOT_POWER
+        if value in (CMD_PREV_PRESET, CMD_NEXT_PRESET, CMD_SELECT_PRESET):
+            return SLOT_SELECT
+    return None
+
+class GyverLamp2Journal:
+    """Ring buffer of the last sent frames."""
+
+    def __init__(self, size: int):
+        # (время отправки, тип кадра, источник, кадр в байтах)
+        self._entries = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, mode: int, payload: bytes, origin: str | None):
+        """Record a sent frame."""
+        self._entries.append((time.time(), mode, origin, payload))
+
+    def final_state(self) -> dict[str, str]:
+        """Get the latest frame of each replayable slot."""
+        state = {}
+        for _, mode, _, payload in self._entries:
+            cmd = payload.decode()
+            slot = frame_slot(cmd, mode)
+            if slot is None:
+                continue
+            state[slot] = cmd
+            if slot == SLOT_PRESETS:
+                # GL,2 несет номер текущего пресета - более ранний выбор не нужен
+                state.pop(SLOT_SELECT, None)
+        return state
+
+    def as_list(self) -> list[dict]:
+        """Get journal entries, oldest first."""
+        return [
+            {
+                'time': timestamp,
+                'type': f"GL,{mode}",
+                'origin': origin,
+                'size': len(payload),
+                'frame': payload.decode(),
+            }
+            for timestamp, mode, origin, payload in self._entries
+        ]
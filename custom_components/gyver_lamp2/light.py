@@ -2,13 +2,23 @@
 from __future__ import annotations
 import logging
 
-from homeassistant.components.light import LightEntity
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_TRANSITION,
+    ColorMode,
+    LightEntity,
+    LightEntityFeature,
+)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_ON
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import DOMAIN, MODE_CONTROL, CMD_ON, CMD_OFF
+from .const import DOMAIN, DATA_GROUPS, MODE_CONTROL, CMD_ON, CMD_OFF
 from .device import GyverLamp2Device
+from .group import GyverLamp2Groups
+from .protocol import calculate_port
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,11 +30,22 @@ async def async_setup_entry(
     """Set up the light platform."""
     device = hass.data[DOMAIN][entry.entry_id]
     async_add_entities([GyverLamp2Light(device)])
+    
+    # Лампы одной группы слушают один broadcast - для них создается общий светильник
+    if DATA_GROUPS not in hass.data:
+        hass.data[DATA_GROUPS] = GyverLamp2Groups(hass)
+    entry.async_on_unload(
+        hass.data[DATA_GROUPS].async_register(device, async_add_entities, GyverLamp2GroupLight)
+    )
 
-class GyverLamp2Light(LightEntity):
+class GyverLamp2Light(LightEntity, RestoreEntity):
     """Representation of a Gyver Lamp 2 light."""
     
     _attr_has_entity_name = True
+    _attr_color_mode = ColorMode.BRIGHTNESS
+    _attr_supported_color_modes = {ColorMode.BRIGHTNESS}
+    _attr_supported_features = LightEntityFeature.TRANSITION
+    _attr_should_poll = False
     
     def __init__(self, device: GyverLamp2Device):
         """Initialize the light."""
@@ -32,20 +53,109 @@ class GyverLamp2Light(LightEntity):
         self._attr_name = "Light"
         self._attr_unique_id = f"{device.entry.entry_id}_light"
         self._attr_device_info = device.device_info
-        self._attr_is_on = False
-        
-        device.add_listener(self._handle_device_update)
+    
+    async def async_added_to_hass(self) -> None:
+        """Restore power state and subscribe to device updates."""
+        # Лампа помнит питание сама, после рестарта HA берем последнее известное
+        last_state = await self.async_get_last_state()
+        if last_state is not None:
+            self._device.note_power(last_state.state == STATE_ON)
+        self.async_on_remove(self._device.add_listener(self._handle_device_update))
     
     def _handle_device_update(self):
         """Handle device state updates."""
         self.async_write_ha_state()
     
+    @property
+    def is_on(self) -> bool:
+        """Return power state."""
+        return self._device.is_on
+    
+    @property
+    def brightness(self) -> int:
+        """Return global brightness."""
+        return self._device.settings.get('brightness', 255)
+    
     async def async_turn_on(self, **kwargs):
         """Turn on the light."""
-        await self._device.send_command(MODE_CONTROL, CMD_ON)
-        self._attr_is_on = True
+        with self._device.trace_command(self.entity_id, self._context):
+            brightness = kwargs.get(ATTR_BRIGHTNESS)
+            transition = kwargs.get(ATTR_TRANSITION)
+            
+            if transition:
+                target = brightness if brightness is not None else self.brightness
+                start = None
+                if not self._device.is_on:
+                    # Плавное включение начинаем с нулевой яркости
+                    start = 0
+                    await self._device.send_brightness_frame(0)
+                await self._device.send_command(MODE_CONTROL, CMD_ON)
+                self._device.transition_brightness(target, transition, start=start)
+            else:
+                # Иначе идущее затухание продолжится и выключит лампу
+                self._device.transitions.cancel('brightness')
+                await self._device.send_command(MODE_CONTROL, CMD_ON)
+                if brightness is not None:
+                    await self._device.set_brightness(brightness)
+            self.async_write_ha_state()
     
     async def async_turn_off(self, **kwargs):
         """Turn off the light."""
-        await self._device.send_command(MODE_CONTROL, CMD_OFF)
-        self._attr_is_on = False
\ No newline at end of file
+        with self._device.trace_command(self.entity_id, self._context):
+            transition = kwargs.get(ATTR_TRANSITION)
+            if transition and self._device.is_on:
+                # Состояние выключения показываем сразу, кадр уйдет в конце затухания
+                self._device.note_power(False)
+                self._device.transition_brightness(0, transition, turn_off=True)
+            else:
+                self._device.transitions.cancel('brightness')
+                await self._device.send_command(MODE_CONTROL, CMD_OFF)
+            self.async_write_ha_state()
+
+class GyverLamp2GroupLight(LightEntity):
+    """Light switching all lamps of a broadcast group with one frame."""
+    
+    _attr_color_mode = ColorMode.ONOFF
+    _attr_supported_color_modes = {ColorMode.ONOFF}
+    _attr_should_poll = False
+    
+    def __init__(self, groups: GyverLamp2Groups, key: tuple):
+        """Initialize the group light."""
+        self._groups = groups
+        self._key = key
+        network_key, group, ip = key
+        self._attr_name = f"Gyver Lamp 2 Group {group}"
+        # Сетевой ключ скрывается в диагностике, поэтому группа определяется портом
+        self._attr_unique_id = f"group_{calculate_port(network_key, group)}_{ip}"
+    
+    @property
+    def is_on(self) -> bool:
+        """Return True if any lamp of the group is on."""
+        return any(device.is_on for device in self._groups.members(self._key))
+    
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return group members."""
+        return {"lamps": [device.entry.title for device in self._groups.members(self._key)]}
+    
+    async def async_turn_on(self, **kwargs):
+        """Turn on all lamps of the group."""
+        await self._async_send_power(CMD_ON)
+    
+    async def async_turn_off(self, **kwargs):
+        """Turn off all lamps of the group."""
+        await self._async_send_power(CMD_OFF)
+    
+    async def _async_send_power(self, command: int):
+        """Send one power frame and apply it to every member."""
+        members = self._groups.members(self._key)
+        if not members:
+            return
+        sender, others = members[0], members[1:]
+        with sender.trace_command(self.entity_id, self._context):
+            for device in members:
+                device.transitions.cancel('brightness')
+            await sender.send_command(MODE_CONTROL, command)
+            for device in others:
+                device.note_group_power(command == CMD_ON)
+        self.async_write_ha_state()
\ No newline at end of file
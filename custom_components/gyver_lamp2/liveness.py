@@ -0,0 +1,138 @@
+"""Online/offline tracking from inbound lamp traffic."""
+from __future__ import annotations
+import asyncio
+import logging
+import socket
+import time
+from collections import deque
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_ECHOES
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS_UNKNOWN = "unknown"
+STATUS_ONLINE = "online"
+STATUS_OFFLINE = "offline"
+
+# Сколько последних отправленных кадров помним, чтобы не считать свое эхо ответом лампы
+ECHO_HISTORY = 16
+
+class _LivenessProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol feeding inbound packets to the tracker."""
+
+    def __init__(self, tracker: GyverLamp2Liveness):
+        self._tracker = tracker
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        """Handle inbound datagram."""
+        self._tracker.handle_datagram(data, addr)
+
+class GyverLamp2Liveness:
+    """Tracks lamp liveness by listening on the group port."""
+
+    def __init__(self, hass: HomeAssistant, timeout: float, on_change: Callable[[str, str], None]):
+        self.hass = hass
+        self._timeout = timeout
+        self._on_change = on_change
+        self._transport = None
+        self._unsub_timer = None
+        self._status = STATUS_UNKNOWN
+        self._last_seen = None
+        self._last_addr = None
+        self._sent = deque(maxlen=ECHO_HISTORY)
+
+    @property
+    def status(self) -> str:
+        """Get liveness status."""
+        return self._status
+
+    @property
+    def last_seen(self) -> float | None:
+        """Get monotonic time of the last inbound packet."""
+        return self._last_seen
+
+    @property
+    def last_address(self) -> str | None:
+        """Get source address of the last inbound packet."""
+        return self._last_addr
+
+    async def async_start(self, port: int):
+        """Start listening on the given port."""
+        # Эхо отсеивается по кадрам всех записей на этом порту: лампы одной группы
+        # слышат и кадры, отправленные другой записью
+        echoes = self.hass.data.setdefault(DATA_ECHOES, {})
+        self._sent = echoes.setdefault(port, deque(maxlen=ECHO_HISTORY))
+        loop = asyncio.get_running_loop()
+        try:
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _LivenessProtocol(self),
+                local_addr=("0.0.0.0", port),
+                family=socket.AF_INET,
+                reuse_port=True,
+                allow_broadcast=True,
+            )
+        except OSError as e:
+            # Без приемника статус остается неизвестным, и кадры продолжают уходить
+            _LOGGER.error(f"Cannot listen on UDP port {port}: {e}")
+            self._transport = None
+            return
+
+    async def async_restart(self, port: int):
+        """Rebind listener to a new port."""
+        self.stop()
+        self._status = STATUS_UNKNOWN
+        self._last_seen = None
+        await self.async_start(port)
+
+    def stop(self):
+        """Stop listening."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    def note_sent(self, cmd: str):
+        """Remember an outgoing frame so its broadcast echo is ignored."""
+        self._sent.append(cmd.encode())
+
+    @callback
+    def handle_datagram(self, data: bytes, addr):
+        """Handle inbound packet from a lamp."""
+        if data in self._sent:
+            return
+        self._last_seen = time.monotonic()
+        self._last_addr = addr[0] if addr else None
+        if self._unsub_timer is None:
+            self._schedule_check(self._timeout)
+        self._set_status(STATUS_ONLINE)
+
+    def _schedule_check(self, delay: float):
+        """Schedule next liveness check."""
+        self._unsub_timer = async_call_later(self.hass, delay, self._async_check)
+
+    @callback
+    def _async_check(self, _now) -> None:
+        """Mark lamp offline when no packets arrived within the timeout."""
+        self._unsub_timer = None
+        # Проверка запускается первым пакетом лампы: прошивка, которая молчит на порту
+        # группы, не должна навсегда переводить лампу в офлайн
+        remaining = self._last_seen + self._timeout - time.monotonic()
+        if remaining > 0:
+            self._schedule_check(remaining)
+            return
+        self._set_status(STATUS_OFFLINE)
+
+    def _set_status(self, status: str):
+        """Update status and report online/offline transitions."""
+        if status == self._status:
+            return
+        previous = self._status
+        self._status = status
+        _LOGGER.debug(f"Lamp status changed: {previous} -> {status}")
+        self._on_change(status, previous)
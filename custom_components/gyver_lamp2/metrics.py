@@ -0,0 +1,97 @@
+"""Command pipeline metrics."""
+from __future__ import annotations
+from bisect import bisect_left
+
+from .const import MODE_CONTROL, MODE_SETTINGS, MODE_PRESETS
+
+# Границы корзин гистограмм в миллисекундах
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        """Record one observation."""
+        self._counts[bisect_left(self._buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    @property
+    def average(self) -> float:
+        """Get average value in milliseconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict:
+        """Get histogram as a serializable dict."""
+        buckets = {f"le_{bound}": count for bound, count in zip(self._buckets, self._counts)}
+        buckets["inf"] = self._counts[-1]
+        return {
+            'count': self.count,
+            'avg_ms': round(self.average, 3),
+            'max_ms': round(self.max, 3),
+            'sum_ms': round(self.total, 3),
+            'buckets': buckets,
+        }
+
+class GyverLamp2Metrics:
+    """Per-device counters and histograms for the command pipeline."""
+
+    def __init__(self):
+        self.frames_sent = {MODE_CONTROL: 0, MODE_SETTINGS: 0, MODE_PRESETS: 0}
+        self.bytes_sent = 0
+        self.send_failures = 0
+        self.storage_writes = 0
+        self.listener_fanouts = 0
+        self.state_writes = 0
+        self.send_latency = Histogram()
+        self.executor_wait = Histogram()
+        self.storage_latency = Histogram()
+
+    @property
+    def total_frames(self) -> int:
+        """Get total number of frames sent."""
+        return sum(self.frames_sent.values())
+
+    def record_send(self, mode: int, size: int, wait_ms: float, latency_ms: float):
+        """Record a successfully sent frame."""
+        self.frames_sent[mode] = self.frames_sent.get(mode, 0) + 1
+        self.bytes_sent += size
+        self.executor_wait.observe(wait_ms)
+        self.send_latency.observe(latency_ms)
+
+    def record_failure(self):
+        """Record a failed send."""
+        self.send_failures += 1
+
+    def record_storage_write(self, latency_ms: float):
+        """Record a storage write."""
+        self.storage_writes += 1
+        self.storage_latency.observe(latency_ms)
+
+    def record_fanout(self, listeners: int):
+        """Record a listener notification round."""
+        self.listener_fanouts += 1
+        self.state_writes += listeners
+
+    def as_dict(self) -> dict:
+        """Get all metrics as a serializable dict."""
+        return {
+            'frames_sent': {f"GL,{mode}": count for mode, count in self.frames_sent.items()},
+            'bytes_sent': self.bytes_sent,
+            'send_failures': self.send_failures,
+            'storage_writes': self.storage_writes,
+            'listener_fanouts': self.listener_fanouts,
+            'state_writes': self.state_writes,
+            'send_latency': self.send_latency.as_dict(),
+            'executor_wait': self.executor_wait.as_dict(),
+            'storage_latency': self.storage_latency.as_dict(),
+        }
@@ -48,6 +48,18 @@ async def async_setup_entry(
 class GyverLamp2Number(NumberEntity):
     """Number for device settings."""
     
+    _attr_should_poll = False
+    
+    # Маппинг для пресетов (ИСПРАВЛЕНО), общий для всех сущностей
+    _key_mapping = {
+        'preset_speed': 'speed',
+        'preset_scale': 'scale',
+        'preset_min_signal': 'min', 
+        'preset_max_signal': 'max',
+        'preset_brightness': 'bright',
+        'preset_color': 'color'
+    }
+    
     def __init__(self, device: GyverLamp2Device, name: str, unique_id_suffix: str, min_val: int, max_val: int, default_val: int, mode: NumberMode, icon: str, setting_type: str, entity_category: EntityCategory):
         """Initialize number."""
         self._device = device
@@ -63,18 +75,12 @@ class GyverLamp2Number(NumberEntity):
         self._attr_has_entity_name = True
         self._setting_key = unique_id_suffix
         self._setting_type = setting_type
-        
-        # Маппинг для пресетов (ИСПРАВЛЕНО)
-        self._key_mapping = {
-            'preset_speed': 'speed',
-            'preset_scale': 'scale',
-            'preset_min_signal': 'min', 
-            'preset_max_signal': 'max',
-            'preset_brightness': 'bright',
-            'preset_color': 'color'
-        }
-        
-        device.add_listener(self._handle_device_update)
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to device updates."""
+        self.async_on_remove(self._device.add_listener(
+            self._handle_device_update, preset_fields=self._setting_type == "preset"
+        ))
     
     def _handle_device_update(self):
         """Handle device state updates."""
@@ -89,11 +95,12 @@ class GyverLamp2Number(NumberEntity):
     
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
-        self._attr_native_value = int(value)
-        if self._setting_type == "settings":
-            await self._device.set_setting(self._setting_key, int(value))
-        elif self._setting_type == "preset":
-            # Используем маппинг для пресетов
-            preset_key = self._key_mapping.get(self._setting_key, self._setting_key.replace('preset_', ''))
-            await self._device.update_current_preset({preset_key: int(value)})
-        self.async_write_ha_state()
\ No newline at end of file
+        with self._device.trace_command(self.entity_id, self._context):
+            self._attr_native_value = int(value)
+            if self._setting_type == "settings":
+                await self._device.set_setting(self._setting_key, int(value))
+            elif self._setting_type == "preset":
+                # Используем маппинг для пресетов
+                preset_key = self._key_mapping.get(self._setting_key, self._setting_key.replace('preset_', ''))
+                await self._device.update_current_preset({preset_key: int(value)})
+            self.async_write_ha_state()
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Host-side preset playlist."""
+from __future__ import annotations
+import logging
+import random
+import time
+from typing import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+class GyverLamp2Playlist:
+    """Switches presets by index on a schedule, one GL,0 frame per step."""
+
+    def __init__(self, hass: HomeAssistant, select: Callable[[int], Awaitable]):
+        self.hass = hass
+        self._select = select
+        # Шаги: (номер пресета, длительность в секундах)
+        self._steps: list[tuple[int, int]] = []
+        self._random = False
+        self._hours: tuple[int, int] | None = None
+        self._position = 0
+        self._next_at = None
+        self._unsub_timer = None
+
+    @property
+    def running(self) -> bool:
+        """Check if the playlist is running."""
+        return bool(self._steps)
+
+    def start(self, steps: list[tuple[int, int]], random_order: bool = False, hours: tuple[int, int] | None = None):
+        """Start a playlist from its first step."""
+        self.stop()
+        self._steps = list(steps)
+        self._random = random_order
+        self._hours = hours
+        self._position = random.randrange(len(self._steps)) if random_order else 0
+        self._schedule(0)
+
+    def stop(self):
+        """Stop the playlist."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._steps = []
+        self._next_at = None
+
+    def pause(self):
+        """Stop the timer but keep the playlist, e.g. on unload."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    def as_dict(self) -> dict | None:
+        """Get playlist state for storage."""
+        if not self._steps:
+            return None
+        return {
+            'steps': [list(step) for step in self._steps],
+            'random': self._random,
+            'hours': list(self._hours) if self._hours else None,
+            'position': self._position,
+            'next_at': self._next_at,
+        }
+
+    def restore(self, data: dict | None):
+        """Resume a stored playlist, keeping the remaining time of the current step."""
+        if not data or not data.get('steps'):
+            return
+        self._steps = [tuple(step) for step in data['steps']]
+        self._random = data.get('random', False)
+        self._hours = tuple(data['hours']) if data.get('hours') else None
+        self._position = data.get('position', 0) % len(self._steps)
+        next_at = data.get('next_at')
+        if next_at is None:
+            self._schedule(0)
+            return
+        # Пока HA был выключен, лампа оставалась на текущем шаге
+        self._next_at = next_at
+        self._unsub_timer = async_call_later(
+            self.hass, max(next_at - time.time(), 0), self._async_advance
+        )
+
+    def _in_window(self) -> bool:
+        """Check if the current hour is inside the playlist hours."""
+        if self._hours is None:
+            return True
+        start, end = self._hours
+        hour = dt_util.now().hour
+        if start == end:
+            return True
+        if start < end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def _schedule(self, delay: float):
+        """Schedule the next step."""
+        self._next_at = time.time() + delay
+        self._unsub_timer = async_call_later(self.hass, delay, self._async_play)
+
+    @callback
+    def _async_advance(self, _now) -> None:
+        """Move to the next step and play it."""
+        self._unsub_timer = None
+        if self._random and len(self._steps) > 1:
+            self._position = random.choice(
+                [index for index in range(len(self._steps)) if index != self._position]
+            )
+        else:
+            self._position = (self._position + 1) % len(self._steps)
+        self._async_play(_now)
+
+    @callback
+    def _async_play(self, _now) -> None:
+        """Select the preset of the current step and wait for its duration."""
+        self._unsub_timer = None
+        if not self._steps:
+            return
+        preset, duration = self._steps[self._position]
+        if not self._in_window():
+            # Вне окна расписания лампа не переключается; проверяем снова в начале часа
+            now = dt_util.now()
+            delay = 3600 - now.minute * 60 - now.second
+            self._next_at = time.time() + delay
+            self._unsub_timer = async_call_later(self.hass, delay, self._async_play)
+            return
+        self._next_at = time.time() + duration
+        self._unsub_timer = async_call_later(self.hass, duration, self._async_advance)
+        _LOGGER.debug(f"Playlist step {self._position + 1}/{len(self._steps)}: preset #{preset}")
+        self.hass.async_create_task(self._select(preset))
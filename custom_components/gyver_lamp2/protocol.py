@@ -0,0 +1,340 @@
+"""Gyver Lamp 2 UDP protocol without Home Assistant.
+
+Command line: python -m custom_components.gyver_lamp2.protocol --help
+"""
+from __future__ import annotations
+import argparse
+import colorsys
+import socket
+import sys
+import time
+
+MODE_CONTROL = 0
+MODE_SETTINGS = 1
+MODE_PRESETS = 2
+CMD_OFF = 0
+CMD_ON = 1
+CMD_PREV_PRESET = 4
+CMD_NEXT_PRESET = 5
+CMD_SELECT_PRESET = 6
+CMD_REBOOT = 11
+MAX_PRESETS = 40  # MAX_PRESETS из прошивки
+
+# Effects (актуальные из исходников)
+EFFECTS = {
+    1: "Перлин",
+    2: "Цвет",
+    3: "Смена цвета",
+    4: "Градиент",
+    5: "Частицы",
+    6: "Огонь",
+    7: "Огонь 2020",
+    8: "Конфетти",
+    9: "Смерч",
+    10: "Часы",
+    11: "Погода"
+}
+
+# Palettes
+PALETTES = {
+    1: "Кастом",
+    2: "Тепловая",
+    3: "Огненная",
+    4: "Лава",
+    5: "Вечеринка",
+    6: "Радуга",
+    7: "Полосатая радуга",
+    8: "Облака",
+    9: "Океан",
+    10: "Лес",
+    11: "Закат",
+    12: "Полиция",
+    13: "Оптимус Прайм",
+    14: "Тёплая лава",
+    15: "Холодная лава",
+    16: "Горячая лава",
+    17: "Розовая лава",
+    18: "Уютный",
+    19: "Киберпанк",
+    20: "Девчачая",
+    21: "Рождество",
+    22: "Кислота",
+    23: "Синий дым",
+    24: "Жвачка",
+    25: "Леопард",
+    26: "Аврора"
+}
+
+# Reaction types (ИСПРАВЛЕНО по прошивке)
+REACTION_TYPES = {
+    1: "Нет",        # GL_ADV_NONE
+    2: "Громкость",  # GL_ADV_VOL
+    3: "Низкие",     # GL_ADV_LOW
+    4: "Высокие",    # GL_ADV_HIGH
+    5: "Часы"        # GL_ADV_CLOCK
+}
+
+# Sound reactions (ИСПРАВЛЕНО по прошивке)
+SOUND_REACTIONS = {
+    1: "Яркость",    # GL_REACT_BRI
+    2: "Масштаб",    # GL_REACT_SCL
+    3: "Длина"       # GL_REACT_LEN
+}
+
+# Change periods
+CHANGE_PERIODS = {
+    1: "1 мин",
+    5: "5 мин",
+    10: "10 мин",
+    15: "15 мин",
+    25: "25 мин",
+    30: "30 мин",
+    40: "40 мин",
+    50: "50 мин",
+    60: "60 мин"
+}
+
+# ADC Modes (ИСПРАВЛЕНО по прошивке)
+ADC_MODES = {
+    1: "Выкл",       # GL_ADC_NONE
+    2: "Яркость",    # GL_ADC_BRI
+    3: "Музыка",     # GL_ADC_MIC
+    4: "Оба"         # GL_ADC_BOTH
+}
+
+# Lamp types
+LAMP_TYPES = {
+    1: "Лента",
+    2: "Зигзаг",
+    3: "Спираль"
+}
+
+# Структура Preset из прошивки, в порядке полей кадра GL,2
+DEFAULT_PRESET = {
+    'effect': 1,           # 0: effect - тип эффекта
+    'fadeBright': 0,       # 1: fadeBright - использовать свою яркость (0/1)
+    'bright': 255,         # 2: bright - яркость пресета
+    'advMode': 1,          # 3: advMode - тип реакции (1-5)
+    'soundReact': 1,       # 4: soundReact - реакция на звук (1-3)
+    'min': 0,              # 5: min - мин сигнал светомузыки
+    'max': 255,            # 6: max - макс сигнал светомузыки
+    'speed': 128,          # 7: speed - скорость эффекта
+    'palette': 1,          # 8: palette - палитра цветов
+    'scale': 255,          # 9: scale - масштаб эффекта
+    'fromCenter': 0,       # 10: fromCenter - эффект из центра (0/1)
+    'color': 0,            # 11: color - основной цвет
+    'fromPal': 0,          # 12: fromPal - использовать палитру (0=цвет, 1=палитра)
+}
+PRESET_KEYS = tuple(DEFAULT_PRESET)
+
+DEFAULT_SETTINGS = {
+    'brightness': 255,
+    'adc_mode': 1,
+    'min_brightness': 0,
+    'max_brightness': 255,
+    'mode_change': 0,
+    'random_order': 0,
+    'change_period': 1,
+    'lamp_type': 1,
+    'max_current': 500,
+    'work_hours_from': 0,
+    'work_hours_to': 23,
+    'matrix_orientation': 1,
+    'matrix_length': 16,
+    'matrix_width': 16,
+    'timezone': 'MSK',
+    'city_id': 0
+}
+
+TIMEZONES = {"MSK": 3, "UTC": 0, "EET": 2}
+
+def calculate_port(network_key: str, group: int) -> int:
+    """Calculate UDP port of a group the way the firmware does."""
+    port_num = 17
+    for char in network_key:
+        port_num *= ord(char)
+        port_num %= 65536
+    return (port_num % 15000) + 50000 + group
+
+def broadcast_ip(ip: str) -> str:
+    """Get broadcast IP for an address or a network prefix like 192.168.1."""
+    if ip.endswith("."):
+        return ip + "255"
+    # Если введен полный IP, берем сеть и добавляем 255
+    parts = ip.split(".")
+    if len(parts) == 4:
+        return ".".join(parts[:3]) + ".255"
+    return ip
+
+def rgb_to_hue(rgb: tuple[int, int, int]) -> int:
+    """Convert RGB to the hue byte used by the preset color field."""
+    hue, _, _ = colorsys.rgb_to_hsv(*(channel / 255 for channel in rgb))
+    return round(hue * 255) % 256
+
+def build_command(mode: int, value: int, extra_value: int = None) -> str:
+    """Build a short command frame."""
+    if extra_value is not None:
+        return f"GL,{mode},{value},{extra_value}"
+    return f"GL,{mode},{value}"
+
+def build_settings_frame(settings: dict) -> str:
+    """Build GL,1 settings frame."""
+    timezone_num = TIMEZONES.get(settings.get('timezone', 'MSK').upper(), 3)
+
+    # int() дает самую короткую запись значения: без "255.0" и "True"
+    cmd_parts = [
+        "GL", '1',
+        str(int(settings.get('brightness', 255))),
+        str(int(settings.get('adc_mode', 1))),
+        str(int(settings.get('min_brightness', 0))),
+        str(int(settings.get('max_brightness', 255))),
+        str(int(settings.get('mode_change', 0))),
+        str(int(settings.get('random_order', 0))),
+        str(int(settings.get('change_period', 1))),
+        str(int(settings.get('lamp_type', 1))),
+        str(int(settings.get('max_current', 500) / 100)),
+        str(int(settings.get('work_hours_from', 0))),
+        str(int(settings.get('work_hours_to', 23))),
+        str(int(settings.get('matrix_orientation', 1))),
+        str(int(settings.get('matrix_length', 16))),
+        str(int(settings.get('matrix_width', 16))),
+        str(timezone_num),
+        str(int(settings.get('city_id', 0)))
+    ]
+    return ','.join(cmd_parts)
+
+def build_presets_frame(presets: list, current_preset: int) -> str:
+    """Build GL,2 frame: count, 13 fields per preset, current preset."""
+    cmd_parts = ["GL", '2', str(len(presets))]
+    for preset in presets:
+        cmd_parts.extend(str(int(preset.get(key, default))) for key, default in DEFAULT_PRESET.items())
+    # Текущий пресет в конце кадра (как в прошивке)
+    cmd_parts.append(str(current_preset))
+    return ','.join(cmd_parts)
+
+def open_socket() -> socket.socket:
+    """Open a UDP socket allowed to broadcast."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    return sock
+
+def send_frame(cmd: str, ip: str, port: int, sock: socket.socket = None):
+    """Send one frame, over the given socket or a temporary one."""
+    if sock is not None:
+        sock.sendto(cmd.encode(), (ip, port))
+        return
+    with open_socket() as sock:
+        sock.sendto(cmd.encode(), (ip, port))
+
+def listen(port: int, seconds: float = None, out=sys.stdout):
+    """Print datagrams arriving on a group port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        # Порт может быть занят интеграцией, которая тоже слушает лампы
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("", port))
+        deadline = None if seconds is None else time.monotonic() + seconds
+        while deadline is None or time.monotonic() < deadline:
+            sock.settimeout(None if deadline is None else max(deadline - time.monotonic(), 0.01))
+            try:
+                data, addr = sock.recvfrom(4096)
+            except socket.timeout:
+                break
+            print(f"{time.strftime('%H:%M:%S')} {addr[0]} {data.decode(errors='replace')}", file=out, flush=True)
+
+_SIMPLE_COMMANDS = {
+    'on': CMD_ON,
+    'off': CMD_OFF,
+    'prev': CMD_PREV_PRESET,
+    'next': CMD_NEXT_PRESET,
+    'reboot': CMD_REBOOT,
+}
+
+def _parser() -> argparse.ArgumentParser:
+    """Build command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.gyver_lamp2.protocol",
+        description="Send Gyver Lamp 2 frames without Home Assistant.",
+    )
+    parser.add_argument("--ip", default="192.168.1.", help="lamp IP or network prefix (default: %(default)s)")
+    parser.add_argument("--key", default="GL", help="network key (default: %(default)s)")
+    parser.add_argument("--group", type=int, default=1, help="group number (default: %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="print frames instead of sending")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("info", help="show port and broadcast address")
+    for name in _SIMPLE_COMMANDS:
+        commands.add_parser(name, help=f"send {name} command")
+    select = commands.add_parser("select", help="select a preset")
+    select.add_argument("preset", type=int)
+    send = commands.add_parser("send", help="send a raw frame")
+    send.add_argument("frame")
+    bank = commands.add_parser("bank", help="upload a preset bank exported by the integration")
+    bank.add_argument("file", help="file with the exported bank, - for stdin")
+    bank.add_argument("--format", default="json", choices=("text", "binary", "json"))
+    listen_cmd = commands.add_parser("listen", help="print datagrams arriving on the group port")
+    listen_cmd.add_argument("--seconds", type=float, help="stop after this time")
+    return parser
+
+def _bank_frame(path: str, fmt: str) -> str:
+    """Read, validate and encode an exported bank."""
+    import json
+    from .bank import decode_bank
+
+    with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as file:
+        data = file.read()
+    try:
+        response = json.loads(data)
+    except ValueError:
+        response = None
+    if isinstance(response, dict) and response and all(
+        isinstance(lamp, dict) and "data" in lamp for lamp in response.values()
+    ):
+        # Ответ export_presets: {device_id: {"format", "count", "size", "data"}}
+        if len(response) != 1:
+            raise ValueError(f"response holds {len(response)} lamps, export one lamp")
+        lamp = next(iter(response.values()))
+        data, fmt = lamp["data"], lamp.get("format", fmt)
+    elif fmt == "json":
+        data = json.loads(data)
+    presets, current = decode_bank(data, fmt)
+    return build_presets_frame(presets, current)
+
+def main(argv: list[str] = None) -> int:
+    """Run the command line."""
+    args = _parser().parse_args(argv)
+    ip = broadcast_ip(args.ip)
+    port = calculate_port(args.key, args.group)
+
+    if args.command == "info":
+        print(f"{ip}:{port}")
+        return 0
+    if args.command == "listen":
+        try:
+            listen(port, args.seconds)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.command in _SIMPLE_COMMANDS:
+        cmd = build_command(MODE_CONTROL, _SIMPLE_COMMANDS[args.command])
+    elif args.command == "select":
+        cmd = build_command(MODE_CONTROL, CMD_SELECT_PRESET, args.preset)
+    elif args.command == "bank":
+        try:
+            cmd = _bank_frame(args.file, args.format)
+        except ValueError as e:
+            print(f"Invalid preset bank: {e}", file=sys.stderr)
+            return 1
+    else:
+        cmd = args.frame
+
+    if args.dry_run:
+        print(cmd)
+    else:
+        send_frame(cmd, ip, port)
+        print(f"Sent {len(cmd)} B to {ip}:{port}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
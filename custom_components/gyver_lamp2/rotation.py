@@ -0,0 +1,76 @@
+"""Host-side model of the firmware preset rotation."""
+from __future__ import annotations
+import logging
+import time
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+class GyverLamp2Rotation:
+    """Follows the lamp's automatic preset change timer without network traffic."""
+
+    def __init__(self, hass: HomeAssistant, on_rotate: Callable[[bool], None]):
+        self.hass = hass
+        # Вызывается на каждом шаге: True - случайный порядок, номер пресета неизвестен
+        self._on_rotate = on_rotate
+        self._config = None
+        self._anchor = None
+        self._unsub_timer = None
+        self._shut_down = False
+
+    @property
+    def active(self) -> bool:
+        """Check if the lamp changes presets on its own."""
+        return self._unsub_timer is not None
+
+    @property
+    def next_change(self) -> float | None:
+        """Get monotonic time of the next modeled preset change."""
+        if self._config is None or self._anchor is None:
+            return None
+        return self._anchor + self._config[1]
+
+    def configure(self, settings: dict) -> bool:
+        """Apply rotation settings sent to the lamp, returning True if they changed."""
+        config = None
+        if settings.get('mode_change', 0) == 1:
+            config = (bool(settings.get('random_order', 0)), settings.get('change_period', 1) * 60)
+        if config == self._config:
+            return False
+        self._config = config
+        self.restart()
+        return True
+
+    def restart(self):
+        """Restart the timer, as the firmware does on preset select or upload."""
+        self.stop()
+        if self._config is None or self._shut_down:
+            return
+        self._anchor = time.monotonic()
+        self._unsub_timer = async_call_later(self.hass, self._config[1], self._async_rotate)
+
+    def stop(self):
+        """Stop modeling."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._anchor = None
+
+    def shutdown(self):
+        """Stop modeling for good, ignoring later restarts."""
+        self._shut_down = True
+        self.stop()
+
+    @callback
+    def _async_rotate(self, _now) -> None:
+        """Advance the model by one period."""
+        random_order, period = self._config
+        # Следующий шаг считаем от якоря, чтобы задержки таймера не накапливались
+        self._anchor += period
+        delay = max(self._anchor + period - time.monotonic(), 0)
+        self._unsub_timer = async_call_later(self.hass, delay, self._async_rotate)
+        _LOGGER.debug(f"Modeled preset change (random: {random_order})")
+        self._on_rotate(random_order)
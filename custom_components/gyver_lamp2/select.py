@@ -63,6 +63,8 @@ async def async_setup_entry(
 class GyverLamp2PresetSelect(SelectEntity):
     """Select for preset selection."""
     
+    _attr_should_poll = False
+    
     def __init__(self, device: GyverLamp2Device):
         """Initialize the select."""
         self._device = device
@@ -72,9 +74,12 @@ class GyverLamp2PresetSelect(SelectEntity):
         self._attr_icon = "mdi:palette"
         self._attr_entity_category = None
         self._attr_has_entity_name = True
+        self._options_revision = None
         self._update_options()
-        
-        device.add_listener(self._handle_device_update)
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to device updates."""
+        self.async_on_remove(self._device.add_listener(self._handle_device_update, preset_fields=True))
     
     def _handle_device_update(self):
         """Handle device state updates."""
@@ -83,27 +88,33 @@ class GyverLamp2PresetSelect(SelectEntity):
     
     def _update_options(self):
         """Update preset options."""
-        self._attr_options = []
-        for i in range(1, len(self._device.presets) + 1):
-            preset_name = self._device.get_preset_name(i)
-            self._attr_options.append(f"{i}. {preset_name}")
+        # Список пересобирается только при изменении банка пресетов
+        revision = self._device.presets_revision
+        if revision != self._options_revision:
+            self._attr_options = self._device.preset_options
+            self._options_revision = revision
         
-        if self._attr_options and 1 <= self._device.current_preset <= len(self._attr_options):
+        if not self._device.current_preset_known:
+            self._attr_current_option = None
+        elif self._attr_options and 1 <= self._device.current_preset <= len(self._attr_options):
             self._attr_current_option = self._attr_options[self._device.current_preset - 1]
         else:
             self._attr_current_option = None
     
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
-        try:
-            preset_number = int(option.split('.')[0])
-            await self._device.send_command(MODE_CONTROL, CMD_SELECT_PRESET, preset_number)
-        except (ValueError, IndexError):
-            _LOGGER.error(f"Invalid preset option: {option}")
+        with self._device.trace_command(self.entity_id, self._context):
+            try:
+                preset_number = int(option.split('.')[0])
+                await self._device.send_command(MODE_CONTROL, CMD_SELECT_PRESET, preset_number)
+            except (ValueError, IndexError):
+                _LOGGER.error(f"Invalid preset option: {option}")
 
 class GyverLamp2GroupSelect(SelectEntity):
     """Select for group selection."""
     
+    _attr_should_poll = False
+    
     def __init__(self, device: GyverLamp2Device):
         """Initialize the group select."""
         self._device = device
@@ -115,8 +126,10 @@ class GyverLamp2GroupSelect(SelectEntity):
         self._attr_has_entity_name = True
         self._attr_options = [f"Группа {i}" for i in range(1, 9)]
         self._attr_current_option = self._attr_options[self._device.current_group - 1]
-        
-        device.add_listener(self._handle_device_update)
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to device updates."""
+        self.async_on_remove(self._device.add_listener(self._handle_device_update))
     
     def _handle_device_update(self):
         """Handle device state updates."""
@@ -125,13 +138,24 @@ class GyverLamp2GroupSelect(SelectEntity):
     
     async def async_select_option(self, option: str) -> None:
         """Change the selected group."""
-        group_number = self._attr_options.index(option) + 1
-        await self._device.set_current_group(group_number)
-        self.async_write_ha_state()
+        with self._device.trace_command(self.entity_id, self._context):
+            group_number = self._attr_options.index(option) + 1
+            await self._device.set_current_group(group_number)
+            self.async_write_ha_state()
 
 class GyverLamp2SettingsSelect(SelectEntity):
     """Select for device settings."""
     
+    _attr_should_poll = False
+    
+    # Маппинг для пресетов (ИСПРАВЛЕНО), общий для всех сущностей
+    _key_mapping = {
+        'preset_effect': 'effect',
+        'preset_palette': 'palette', 
+        'preset_reaction': 'advMode',
+        'preset_sound_reaction': 'soundReact'
+    }
+    
     def __init__(self, device: GyverLamp2Device, name: str, unique_id_suffix: str, options: dict, default_option: str, icon: str, setting_type: str, entity_category: EntityCategory):
         """Initialize settings select."""
         self._device = device
@@ -146,16 +170,12 @@ class GyverLamp2SettingsSelect(SelectEntity):
         self._options_dict = options
         self._setting_key = unique_id_suffix
         self._setting_type = setting_type
-        
-        # Маппинг для пресетов (ИСПРАВЛЕНО)
-        self._key_mapping = {
-            'preset_effect': 'effect',
-            'preset_palette': 'palette', 
-            'preset_reaction': 'advMode',
-            'preset_sound_reaction': 'soundReact'
-        }
-        
-        device.add_listener(self._handle_device_update)
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to device updates."""
+        self.async_on_remove(self._device.add_listener(
+            self._handle_device_update, preset_fields=self._setting_type == "preset"
+        ))
     
     def _handle_device_update(self):
         """Handle device state updates."""
@@ -171,14 +191,15 @@ class GyverLamp2SettingsSelect(SelectEntity):
     
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
-        self._attr_current_option = option
-        for key, value in self._options_dict.items():
-            if value == option:
-                if self._setting_type == "settings":
-                    await self._device.set_setting(self._setting_key, key)
-                elif self._setting_type == "preset":
-                    # Используем маппинг для пресетов
-                    preset_key = self._key_mapping.get(self._setting_key, self._setting_key.replace('preset_', ''))
-                    await self._device.update_current_preset({preset_key: key})
-                break
-        self.async_write_ha_state()
\ No newline at end of file
+        with self._device.trace_command(self.entity_id, self._context):
+            self._attr_current_option = option
+            for key, value in self._options_dict.items():
+                if value == option:
+                    if self._setting_type == "settings":
+                        await self._device.set_setting(self._setting_key, key)
+                    elif self._setting_type == "preset":
+                        # Используем маппинг для пресетов
+                        preset_key = self._key_mapping.get(self._setting_key, self._setting_key.replace('preset_', ''))
+                        await self._device.update_current_preset({preset_key: key})
+                    break
+            self.async_write_ha_state()
\ No newline at end of file
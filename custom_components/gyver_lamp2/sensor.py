@@ -1,18 +1,38 @@
 """Sensor platform for Gyver Lamp 2."""
 from __future__ import annotations
 import logging
+import time
+import zlib
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 
 from .const import DOMAIN
 from .device import GyverLamp2Device
 
 _LOGGER = logging.getLogger(__name__)
 
+# Не чаще одной записи состояния сенсора за это время (секунды)
+MIN_STATE_INTERVAL = 1
+
+# Короткие кадры показываются как есть, длинные - кратким описанием
+SHORT_FRAME = 32
+
+def frame_summary(cmd: str | None) -> str | None:
+    """Get short description of a frame: type, preset count, size and hash."""
+    if cmd is None or len(cmd) <= SHORT_FRAME:
+        return cmd
+    parts = cmd.split(',', 3)
+    frame_type = ','.join(parts[:2])
+    checksum = f"{zlib.crc32(cmd.encode()):08x}"
+    if parts[1] == '2':
+        return f"{frame_type} {parts[2]} presets, {len(cmd)} B, {checksum}"
+    return f"{frame_type} {len(cmd)} B, {checksum}"
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -27,12 +47,28 @@ async def async_setup_entry(
         GyverLamp2Sensor(device, "Current Preset", "current_preset", "current_preset", "mdi:palette", EntityCategory.DIAGNOSTIC),
         GyverLamp2Sensor(device, "Presets Count", "presets_count", "presets_count", "mdi:counter", EntityCategory.DIAGNOSTIC),
         GyverLamp2Sensor(device, "Online Status", "online_status", "online_status", "mdi:lan-connect", EntityCategory.DIAGNOSTIC),
+        GyverLamp2Sensor(device, "Bank Size", "bank_size", "bank_size", "mdi:file-chart", EntityCategory.DIAGNOSTIC),
     ]
+    
+    # Сенсоры метрик создаются только если метрики включены
+    if device.metrics is not None:
+        sensors.extend([
+            GyverLamp2Sensor(device, "Frames Sent", "frames_sent", "frames_sent", "mdi:send", EntityCategory.DIAGNOSTIC),
+            GyverLamp2Sensor(device, "Bytes Sent", "bytes_sent", "bytes_sent", "mdi:database-arrow-up", EntityCategory.DIAGNOSTIC),
+            GyverLamp2Sensor(device, "Send Failures", "send_failures", "send_failures", "mdi:alert-circle", EntityCategory.DIAGNOSTIC),
+            GyverLamp2Sensor(device, "Send Latency", "send_latency", "send_latency", "mdi:timer-outline", EntityCategory.DIAGNOSTIC),
+            GyverLamp2Sensor(device, "Storage Writes", "storage_writes", "storage_writes", "mdi:content-save", EntityCategory.DIAGNOSTIC),
+        ])
     async_add_entities(sensors)
 
 class GyverLamp2Sensor(SensorEntity):
     """Sensor for device info."""
     
+    _attr_should_poll = False
+    
+    # Полный кадр виден в интерфейсе, но не пишется в базу recorder
+    _unrecorded_attributes = frozenset({"frame"})
+    
     def __init__(self, device: GyverLamp2Device, name: str, unique_id_suffix: str, sensor_type: str, icon: str, entity_category: EntityCategory):
         """Initialize sensor."""
         self._device = device
@@ -43,29 +79,79 @@ class GyverLamp2Sensor(SensorEntity):
         self._attr_icon = icon
         self._attr_entity_category = entity_category
         self._attr_has_entity_name = True
+        if sensor_type == "send_latency":
+            self._attr_native_unit_of_measurement = "ms"
+        elif sensor_type == "bank_size":
+            self._attr_native_unit_of_measurement = "B"
         
+        self._last_write = 0.0
+        self._unsub_write = None
         self._update_value()
-        
-        device.add_listener(self._handle_device_update)
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to device updates."""
+        self.async_on_remove(self._device.add_listener(self._handle_device_update))
+        self.async_on_remove(self._cancel_write)
     
     def _handle_device_update(self):
-        """Handle device state updates."""
+        """Handle device state updates, writing state only when it changed."""
+        previous = (self._attr_native_value, self.extra_state_attributes)
+        self._update_value()
+        if (self._attr_native_value, self.extra_state_attributes) == previous:
+            return
+        if self._unsub_write is not None:
+            return
+        delay = self._last_write + MIN_STATE_INTERVAL - time.monotonic()
+        if delay > 0:
+            # Промежуточные значения пропускаются, записывается последнее
+            self._unsub_write = async_call_later(self.hass, delay, self._async_write_delayed)
+            return
+        self._write_state()
+    
+    @callback
+    def _async_write_delayed(self, _now) -> None:
+        """Write the latest value once the rate limit allows."""
+        self._unsub_write = None
         self._update_value()
+        self._write_state()
+    
+    def _write_state(self):
+        """Write state and remember when."""
+        self._last_write = time.monotonic()
         self.async_write_ha_state()
     
+    def _cancel_write(self):
+        """Cancel pending delayed write."""
+        if self._unsub_write is not None:
+            self._unsub_write()
+            self._unsub_write = None
+    
     def _update_value(self):
         """Update sensor value based on type."""
         if self._sensor_type == "port":
             self._attr_native_value = self._device.port
         elif self._sensor_type == "last_command":
-            self._attr_native_value = self._device.last_command
+            self._attr_native_value = frame_summary(self._device.last_command)
+            self._attr_extra_state_attributes = {"frame": self._device.last_command}
         elif self._sensor_type == "current_preset":
-            self._attr_native_value = self._device.current_preset
+            # После случайной автосмены номер пресета неизвестен
+            self._attr_native_value = self._device.current_preset if self._device.current_preset_known else None
         elif self._sensor_type == "presets_count":
             self._attr_native_value = len(self._device.presets)
         elif self._sensor_type == "online_status":
-            # Простой статус - всегда онлайн, так как мы можем отправлять команды
-            self._attr_native_value = "Online"
+            self._attr_native_value = self._device.online_status
+        elif self._sensor_type == "bank_size":
+            self._attr_native_value = self._device.bank_size
+        elif self._sensor_type == "frames_sent":
+            self._attr_native_value = self._device.metrics.total_frames
+        elif self._sensor_type == "bytes_sent":
+            self._attr_native_value = self._device.metrics.bytes_sent
+        elif self._sensor_type == "send_failures":
+            self._attr_native_value = self._device.metrics.send_failures
+        elif self._sensor_type == "send_latency":
+            self._attr_native_value = round(self._device.metrics.send_latency.average, 2)
+        elif self._sensor_type == "storage_writes":
+            self._attr_native_value = self._device.metrics.storage_writes
     
     async def async_update(self) -> None:
         """Update sensor value."""
@@ -0,0 +1,455 @@
+"""Services for Gyver Lamp 2."""
+from __future__ import annotations
+import logging
+import time
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+
+from .const import (
+    DOMAIN,
+    SERVICE_UPDATE_PRESET,
+    SERVICE_INSERT_PRESET,
+    SERVICE_DELETE_PRESET,
+    SERVICE_MOVE_PRESET,
+    SERVICE_SWAP_PRESETS,
+    SERVICE_DUPLICATE_PRESETS,
+    SERVICE_START_PLAYLIST,
+    SERVICE_STOP_PLAYLIST,
+    SERVICE_EXPORT_PRESETS,
+    SERVICE_IMPORT_PRESETS,
+    SERVICE_FLEET_APPLY,
+    SERVICE_START_PREVIEW,
+    SERVICE_COMMIT_PREVIEW,
+    SERVICE_REVERT_PREVIEW,
+    SERVICE_START_STREAM,
+    SERVICE_STREAM_SAMPLE,
+    SERVICE_STOP_STREAM,
+    ATTR_DEVICE_ID,
+    ATTR_INDEX,
+    ATTR_TO_INDEX,
+    ATTR_COUNT,
+    ATTR_PRESETS,
+    ATTR_DURATION,
+    ATTR_DURATIONS,
+    ATTR_RANDOM,
+    ATTR_FROM_HOUR,
+    ATTR_TO_HOUR,
+    ATTR_FORMAT,
+    ATTR_DATA,
+    ATTR_POWER,
+    ATTR_PRESET,
+    ATTR_BRIGHTNESS,
+    ATTR_PARALLEL,
+    ATTR_RATE,
+    ATTR_COLOR,
+    ATTR_RGB_COLOR,
+    ATTR_TRANSITION,
+    MAX_PRESETS,
+    MODE_CONTROL,
+    CMD_ON,
+    CMD_OFF,
+    CMD_SELECT_PRESET,
+    PRESET_SERVICE_FIELDS,
+    EFFECTS,
+    PALETTES,
+    REACTION_TYPES,
+    SOUND_REACTIONS,
+)
+from .bank import FORMATS, FORMAT_TEXT, decode_bank
+from .device import PRESET_FADE_KEYS, GyverLamp2Device
+from .fleet import DEFAULT_PARALLEL, async_apply, fleet_batch
+from .protocol import rgb_to_hue
+from .stream import DEFAULT_STREAM_RATE, MAX_STREAM_RATE
+
+_LOGGER = logging.getLogger(__name__)
+
+_BYTE = vol.All(vol.Coerce(int), vol.Range(min=0, max=255))
+_FLAG = vol.All(cv.boolean, vol.Coerce(int))
+
+# Проверка значений полей пресета
+PRESET_FIELDS_SCHEMA = {
+    vol.Optional("effect"): vol.All(vol.Coerce(int), vol.In(EFFECTS)),
+    vol.Optional("fade_bright"): _FLAG,
+    vol.Optional("bright"): _BYTE,
+    vol.Optional("adv_mode"): vol.All(vol.Coerce(int), vol.In(REACTION_TYPES)),
+    vol.Optional("sound_react"): vol.All(vol.Coerce(int), vol.In(SOUND_REACTIONS)),
+    vol.Optional("min"): _BYTE,
+    vol.Optional("max"): _BYTE,
+    vol.Optional("speed"): _BYTE,
+    vol.Optional("palette"): vol.All(vol.Coerce(int), vol.In(PALETTES)),
+    vol.Optional("scale"): _BYTE,
+    vol.Optional("from_center"): _FLAG,
+    vol.Optional("color"): _BYTE,
+    vol.Optional("from_pal"): _FLAG,
+}
+
+DEVICE_SCHEMA = {
+    vol.Required(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+}
+
+_INDEX = vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_PRESETS))
+
+INSERT_PRESET_SCHEMA = vol.Schema({
+    **DEVICE_SCHEMA,
+    vol.Required(ATTR_INDEX): _INDEX,
+    **PRESET_FIELDS_SCHEMA,
+})
+
+UPDATE_PRESET_SCHEMA = INSERT_PRESET_SCHEMA.extend({
+    vol.Optional(ATTR_TRANSITION): vol.All(vol.Coerce(float), vol.Range(min=0, max=300)),
+})
+
+DELETE_PRESET_SCHEMA = vol.Schema({
+    **DEVICE_SCHEMA,
+    vol.Required(ATTR_INDEX): _INDEX,
+})
+
+MOVE_PRESET_SCHEMA = vol.Schema({
+    **DEVICE_SCHEMA,
+    vol.Required(ATTR_INDEX): _INDEX,
+    vol.Required(ATTR_TO_INDEX): _INDEX,
+})
+
+DUPLICATE_PRESETS_SCHEMA = vol.Schema({
+    **DEVICE_SCHEMA,
+    vol.Required(ATTR_INDEX): _INDEX,
+    vol.Optional(ATTR_COUNT, default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_PRESETS)),
+})
+
+_SECONDS = vol.All(vol.Coerce(int), vol.Range(min=1))
+_HOUR = vol.All(vol.Coerce(int), vol.Range(min=0, max=23))
+
+START_PLAYLIST_SCHEMA = vol.Schema({
+    **DEVICE_SCHEMA,
+    vol.Required(ATTR_PRESETS): vol.All(cv.ensure_list, vol.Length(min=1), [_INDEX]),
+    vol.Optional(ATTR_DURATION, default=300): _SECONDS,
+    vol.Optional(ATTR_DURATIONS): vol.All(cv.ensure_list, [_SECONDS]),
+    vol.Optional(ATTR_RANDOM, default=False): cv.boolean,
+    vol.Inclusive(ATTR_FROM_HOUR, "hours"): _HOUR,
+    vol.Inclusive(ATTR_TO_HOUR, "hours"): _HOUR,
+})
+
+STOP_PLAYLIST_SCHEMA = vol.Schema(DEVICE_SCHEMA)
+
+EXPORT_PRESETS_SCHEMA = vol.Schema({
+    **DEVICE_SCHEMA,
+    vol.Optional(ATTR_FORMAT, default=FORMAT_TEXT): vol.In(FORMATS),
+})
+
+IMPORT_PRESETS_SCHEMA = vol.Schema({
+    **DEVICE_SCHEMA,
+    vol.Optional(ATTR_FORMAT, default=FORMAT_TEXT): vol.In(FORMATS),
+    vol.Required(ATTR_DATA): vol.Any(str, dict),
+})
+
+PREVIEW_SCHEMA = vol.Schema(DEVICE_SCHEMA)
+
+START_STREAM_SCHEMA = vol.Schema({
+    **DEVICE_SCHEMA,
+    vol.Optional(ATTR_RATE, default=DEFAULT_STREAM_RATE): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_STREAM_RATE)
+    ),
+})
+
+STREAM_SAMPLE_SCHEMA = vol.All(
+    vol.Schema({
+        **DEVICE_SCHEMA,
+        vol.Exclusive(ATTR_COLOR, "color"): _BYTE,
+        vol.Exclusive(ATTR_RGB_COLOR, "color"): vol.All(vol.Coerce(tuple), vol.ExactSequence((_BYTE,) * 3)),
+        vol.Optional(ATTR_BRIGHTNESS): _BYTE,
+    }),
+    cv.has_at_least_one_key(ATTR_COLOR, ATTR_RGB_COLOR, ATTR_BRIGHTNESS),
+)
+
+STOP_STREAM_SCHEMA = vol.Schema(DEVICE_SCHEMA)
+
+FLEET_APPLY_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_POWER): cv.boolean,
+        vol.Optional(ATTR_PRESET): _INDEX,
+        vol.Optional(ATTR_BRIGHTNESS): _BYTE,
+        vol.Optional(ATTR_PARALLEL, default=DEFAULT_PARALLEL): vol.All(vol.Coerce(int), vol.Range(min=1, max=64)),
+        **PRESET_FIELDS_SCHEMA,
+    }),
+    cv.has_at_least_one_key(ATTR_POWER, ATTR_PRESET, ATTR_BRIGHTNESS, *PRESET_SERVICE_FIELDS),
+)
+
+def preset_updates(data: dict) -> dict:
+    """Convert service fields to preset structure keys."""
+    return {
+        PRESET_SERVICE_FIELDS[field]: value
+        for field, value in data.items()
+        if field in PRESET_SERVICE_FIELDS
+    }
+
+def get_device(hass: HomeAssistant, device_id: str) -> GyverLamp2Device:
+    """Resolve a device registry id to a loaded lamp."""
+    device_entry = dr.async_get(hass).async_get(device_id)
+    if device_entry is None:
+        raise HomeAssistantError(f"Unknown device: {device_id}")
+    loaded = hass.data.get(DOMAIN, {})
+    for domain, entry_id in device_entry.identifiers:
+        if domain == DOMAIN and entry_id in loaded:
+            return loaded[entry_id]
+    raise HomeAssistantError(f"Device {device_id} is not a loaded Gyver Lamp 2")
+
+def get_devices(hass: HomeAssistant, call: ServiceCall) -> list[GyverLamp2Device]:
+    """Resolve target devices of a service call."""
+    return [get_device(hass, device_id) for device_id in call.data[ATTR_DEVICE_ID]]
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register integration services."""
+
+    async def async_update_preset(call: ServiceCall) -> None:
+        """Edit a preset in place."""
+        index = call.data[ATTR_INDEX]
+        transition = call.data.get(ATTR_TRANSITION)
+        for device in get_devices(hass, call):
+            updates = preset_updates(call.data)
+            fades = {}
+            if transition:
+                # Плавно меняются только яркость и цвет текущего пресета, остальное сразу
+                if index != device.current_preset:
+                    raise HomeAssistantError(
+                        f"Transition only applies to the current preset of {device.entry.title}"
+                    )
+                fades = {key: updates.pop(key) for key in PRESET_FADE_KEYS if key in updates}
+            with device.trace_command(f"{DOMAIN}.{call.service}", call.context):
+                # update_preset отказывает и для несуществующего пресета, и по лимиту кадра
+                if not 1 <= index <= len(device.presets):
+                    raise HomeAssistantError(f"Preset #{index} does not exist")
+                for key, target in fades.items():
+                    device.transition_preset_value(key, target, transition)
+                if updates and not await device.update_preset(index, updates):
+                    raise HomeAssistantError(
+                        f"Preset #{index} of {device.entry.title} not changed: "
+                        "the preset bank would exceed the frame size limit"
+                    )
+
+    async def async_change_bank(call: ServiceCall) -> None:
+        """Apply a structural change to the preset bank."""
+        index = call.data[ATTR_INDEX]
+        for device in get_devices(hass, call):
+            with device.trace_command(f"{DOMAIN}.{call.service}", call.context):
+                if call.service == SERVICE_INSERT_PRESET:
+                    done = await device.insert_preset(index, preset_updates(call.data))
+                elif call.service == SERVICE_DELETE_PRESET:
+                    done = await device.delete_preset(index)
+                elif call.service == SERVICE_MOVE_PRESET:
+                    done = await device.move_preset(index, call.data[ATTR_TO_INDEX])
+                elif call.service == SERVICE_SWAP_PRESETS:
+                    done = await device.swap_presets(index, call.data[ATTR_TO_INDEX])
+                else:
+                    done = await device.duplicate_presets(index, call.data[ATTR_COUNT])
+            if not done:
+                raise HomeAssistantError(
+                    f"Cannot apply {call.service} to preset #{index} of {device.entry.title}"
+                )
+
+    async def async_start_playlist(call: ServiceCall) -> None:
+        """Start switching presets by schedule."""
+        presets = call.data[ATTR_PRESETS]
+        durations = call.data.get(ATTR_DURATIONS, [])
+        if len(durations) > len(presets):
+            raise HomeAssistantError("More durations than presets")
+        # Шаги без своей длительности используют общую
+        steps = [
+            (preset, durations[index] if index < len(durations) else call.data[ATTR_DURATION])
+            for index, preset in enumerate(presets)
+        ]
+        hours = None
+        if ATTR_FROM_HOUR in call.data:
+            hours = (call.data[ATTR_FROM_HOUR], call.data[ATTR_TO_HOUR])
+        for device in get_devices(hass, call):
+            with device.trace_command(f"{DOMAIN}.{call.service}", call.context):
+                if not await device.start_playlist(steps, call.data[ATTR_RANDOM], hours):
+                    raise HomeAssistantError(
+                        f"Playlist refers to presets missing on {device.entry.title}"
+                    )
+
+    async def async_stop_playlist(call: ServiceCall) -> None:
+        """Stop switching presets by schedule."""
+        for device in get_devices(hass, call):
+            await device.stop_playlist()
+
+    async def async_start_preview(call: ServiceCall) -> None:
+        """Start previewing preset edits without saving them."""
+        for device in get_devices(hass, call):
+            device.start_preview()
+
+    async def async_finish_preview(call: ServiceCall) -> None:
+        """Commit or revert previewed preset edits."""
+        for device in get_devices(hass, call):
+            with device.trace_command(f"{DOMAIN}.{call.service}", call.context):
+                if call.service == SERVICE_COMMIT_PREVIEW:
+                    done = await device.commit_preview()
+                else:
+                    done = await device.revert_preview()
+            if not done:
+                raise HomeAssistantError(f"No preset preview is open on {device.entry.title}")
+
+    async def async_start_stream(call: ServiceCall) -> None:
+        """Start streaming color and brightness samples."""
+        for device in get_devices(hass, call):
+            if not device.start_stream(call.data[ATTR_RATE]):
+                raise HomeAssistantError(f"Close the preset preview on {device.entry.title} first")
+
+    async def async_stream_sample(call: ServiceCall) -> None:
+        """Take one streamed sample; stale ones are dropped."""
+        color = call.data.get(ATTR_COLOR)
+        if ATTR_RGB_COLOR in call.data:
+            color = rgb_to_hue(call.data[ATTR_RGB_COLOR])
+        for device in get_devices(hass, call):
+            if not device.stream.running:
+                raise HomeAssistantError(f"No stream is running on {device.entry.title}")
+            device.push_stream_sample(color, call.data.get(ATTR_BRIGHTNESS))
+
+    async def async_stop_stream(call: ServiceCall) -> ServiceResponse:
+        """Stop streaming and return achieved fps and dropped samples."""
+        devices = get_devices(hass, call)
+        stats = {}
+        for device_id, device in zip(call.data[ATTR_DEVICE_ID], devices):
+            stats[device_id] = await device.stop_stream()
+        return stats
+
+    async def async_export_presets(call: ServiceCall) -> ServiceResponse:
+        """Return preset banks of the devices."""
+        fmt = call.data[ATTR_FORMAT]
+        devices = get_devices(hass, call)
+        return {
+            device_id: {
+                "format": fmt,
+                "count": len(device.presets),
+                "size": device.bank_size,
+                "data": device.export_presets(fmt),
+            }
+            for device_id, device in zip(call.data[ATTR_DEVICE_ID], devices)
+        }
+
+    async def async_import_presets(call: ServiceCall) -> None:
+        """Replace preset banks with an exported one."""
+        try:
+            presets, current = decode_bank(call.data[ATTR_DATA], call.data[ATTR_FORMAT])
+        except ValueError as e:
+            raise HomeAssistantError(f"Invalid preset bank: {e}") from e
+        for device in get_devices(hass, call):
+            with device.trace_command(f"{DOMAIN}.{call.service}", call.context):
+                if not await device.import_presets(presets, current):
+                    raise HomeAssistantError(
+                        f"Preset bank does not fit into a frame for {device.entry.title}"
+                    )
+
+    async def async_fleet_apply(call: ServiceCall) -> ServiceResponse:
+        """Apply one change to many lamps concurrently."""
+        if ATTR_DEVICE_ID in call.data:
+            targets = list(zip(call.data[ATTR_DEVICE_ID], get_devices(hass, call)))
+        else:
+            registry = dr.async_get(hass)
+            targets = [
+                (registry.async_get_device(identifiers={(DOMAIN, entry_id)}).id, device)
+                for entry_id, device in hass.data.get(DOMAIN, {}).items()
+            ]
+        updates = preset_updates(call.data)
+        preset = call.data.get(ATTR_PRESET)
+        brightness = call.data.get(ATTR_BRIGHTNESS)
+        power = call.data.get(ATTR_POWER)
+
+        async def apply(target) -> bool:
+            device = target[1]
+            with device.trace_command(f"{DOMAIN}.{call.service}", call.context):
+                if preset is not None and preset > len(device.presets):
+                    raise HomeAssistantError(f"Preset #{preset} does not exist")
+                # Правки относятся к выбираемому пресету, а без выбора - к текущему.
+                # Порядок: банк, выбор, яркость, питание
+                success = True
+                if updates:
+                    success &= await device.update_preset(preset or device.current_preset, updates)
+                if preset is not None:
+                    success &= await device.send_command(MODE_CONTROL, CMD_SELECT_PRESET, preset)
+                if brightness is not None:
+                    success &= await device.set_brightness(brightness)
+                if power is not None:
+                    success &= await device.send_command(MODE_CONTROL, CMD_ON if power else CMD_OFF)
+                return success
+
+        started = time.perf_counter()
+        with fleet_batch() as batch:
+            results = await async_apply(targets, apply, call.data[ATTR_PARALLEL])
+        return {
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "frames_deduplicated": batch.deduplicated,
+            "lamps": {
+                device_id: {"name": device.entry.title, **result}
+                for (device_id, device), result in zip(targets, results)
+            },
+        }
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_UPDATE_PRESET, async_update_preset, schema=UPDATE_PRESET_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_INSERT_PRESET, async_change_bank, schema=INSERT_PRESET_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_DELETE_PRESET, async_change_bank, schema=DELETE_PRESET_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_MOVE_PRESET, async_change_bank, schema=MOVE_PRESET_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SWAP_PRESETS, async_change_bank, schema=MOVE_PRESET_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_DUPLICATE_PRESETS, async_change_bank, schema=DUPLICATE_PRESETS_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_PLAYLIST, async_start_playlist, schema=START_PLAYLIST_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_STOP_PLAYLIST, async_stop_playlist, schema=STOP_PLAYLIST_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_PREVIEW, async_start_preview, schema=PREVIEW_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_COMMIT_PREVIEW, async_finish_preview, schema=PREVIEW_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_REVERT_PREVIEW, async_finish_preview, schema=PREVIEW_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_STREAM, async_start_stream, schema=START_STREAM_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_STREAM_SAMPLE, async_stream_sample, schema=STREAM_SAMPLE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_STREAM,
+        async_stop_stream,
+        schema=STOP_STREAM_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_PRESETS,
+        async_export_presets,
+        schema=EXPORT_PRESETS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_IMPORT_PRESETS, async_import_presets, schema=IMPORT_PRESETS_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FLEET_APPLY,
+        async_fleet_apply,
+        schema=FLEET_APPLY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,129 @@
+"""Streaming color and brightness from fast external sources."""
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_STREAM_RATE = 25
+MAX_STREAM_RATE = 50
+
+# Без новых сэмплов поток останавливается сам, чтобы лампа вернулась к своему банку
+STREAM_IDLE_TIMEOUT = 10
+
+class GyverLamp2Stream:
+    """Keeps only the latest sample and sends it at a bounded rate."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send: Callable[[dict], Awaitable[bool]],
+        on_idle: Callable[[], Awaitable],
+    ):
+        self.hass = hass
+        self._send = send
+        self._on_idle = on_idle
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._values: dict[str, int] = {}
+        self._pending = False
+        self._rate = DEFAULT_STREAM_RATE
+        self._started = None
+        self._stopped = None
+        self.samples = 0
+        self.frames = 0
+        self.dropped = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        """Check if the stream is running."""
+        return self._task is not None
+
+    @property
+    def fps(self) -> float:
+        """Get achieved frame rate of the current or last stream."""
+        if self._started is None:
+            return 0.0
+        elapsed = (self._stopped or time.monotonic()) - self._started
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    def start(self, values: dict[str, int], rate: int = DEFAULT_STREAM_RATE):
+        """Start streaming from initial values, resetting counters."""
+        self.stop()
+        self._values = dict(values)
+        self._rate = max(1, min(rate, MAX_STREAM_RATE))
+        self.samples = self.frames = self.dropped = self.failures = 0
+        self._started = time.monotonic()
+        self._stopped = None
+        # Первый кадр сразу переводит лампу в режим потока
+        self._pending = True
+        self._wakeup.set()
+        self._task = self.hass.async_create_task(self._async_run())
+
+    def push(self, **values: int | None):
+        """Take a sample; one not sent yet is replaced and counted as dropped."""
+        if self._task is None:
+            return
+        self.samples += 1
+        if self._pending:
+            self.dropped += 1
+        self._values.update({key: value for key, value in values.items() if value is not None})
+        self._pending = True
+        self._wakeup.set()
+
+    def stop(self) -> bool:
+        """Stop streaming, returning True if it was running."""
+        task, self._task = self._task, None
+        if task is None:
+            return False
+        task.cancel()
+        self._stopped = time.monotonic()
+        return True
+
+    async def _async_run(self):
+        """Send the latest sample at most rate times per second."""
+        loop = asyncio.get_running_loop()
+        interval = 1 / self._rate
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), STREAM_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                self._wakeup.clear()
+                self._pending = False
+                sent_at = loop.time()
+                try:
+                    if await self._send(dict(self._values)):
+                        self.frames += 1
+                    else:
+                        # Лампа офлайн или запись выгружена - сэмпл не ушел
+                        self.dropped += 1
+                except Exception as e:
+                    self.failures += 1
+                    _LOGGER.debug(f"Stream frame failed: {e}")
+                # Сэмплы, пришедшие за этот интервал, сливаются в один кадр
+                await asyncio.sleep(max(interval - (loop.time() - sent_at), 0))
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+                self._stopped = time.monotonic()
+        _LOGGER.debug(f"Stream idle for {STREAM_IDLE_TIMEOUT} s, stopping")
+        await self._on_idle()
+
+    def as_dict(self) -> dict:
+        """Get stream state and counters."""
+        return {
+            'running': self.running,
+            'rate': self._rate,
+            'samples': self.samples,
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'failures': self.failures,
+            'fps': round(self.fps, 1),
+        }
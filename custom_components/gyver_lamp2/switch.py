@@ -43,6 +43,15 @@ async def async_setup_entry(
 class GyverLamp2Switch(SwitchEntity):
     """Switch for device settings."""
     
+    _attr_should_poll = False
+    
+    # Маппинг для пресетов (ИСПРАВЛЕНО), общий для всех сущностей
+    _key_mapping = {
+        'preset_reduce_brightness': 'fadeBright',
+        'preset_from_center': 'fromCenter',
+        'preset_from_palette': 'fromPal'
+    }
+    
     def __init__(self, device: GyverLamp2Device, name: str, unique_id_suffix: str, default_state: bool, icon: str, setting_type: str, entity_category):
         """Initialize switch."""
         self._device = device
@@ -55,20 +64,17 @@ class GyverLamp2Switch(SwitchEntity):
         self._setting_key = unique_id_suffix
         self._setting_type = setting_type
         
-        # Маппинг для пресетов (ИСПРАВЛЕНО)
-        self._key_mapping = {
-            'preset_reduce_brightness': 'fadeBright',
-            'preset_from_center': 'fromCenter',
-            'preset_from_palette': 'fromPal'
-        }
-        
         if entity_category == "config":
             from homeassistant.helpers.entity import EntityCategory
             self._attr_entity_category = EntityCategory.CONFIG
         else:
             self._attr_entity_category = entity_category
-        
-        device.add_listener(self._handle_device_update)
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to device updates."""
+        self.async_on_remove(self._device.add_listener(
+            self._handle_device_update, preset_fields=self._setting_type == "preset"
+        ))
     
     def _handle_device_update(self):
         """Handle device state updates."""
@@ -82,22 +88,24 @@ class GyverLamp2Switch(SwitchEntity):
     
     async def async_turn_on(self, **kwargs):
         """Turn on the switch."""
-        self._attr_is_on = True
-        if self._setting_type == "settings":
-            await self._device.set_setting(self._setting_key, 1)
-        elif self._setting_type == "preset":
-            # Используем маппинг для пресетов
-            preset_key = self._key_mapping.get(self._setting_key, self._setting_key.replace('preset_', ''))
-            await self._device.update_current_preset({preset_key: 1})
-        self.async_write_ha_state()
+        with self._device.trace_command(self.entity_id, self._context):
+            self._attr_is_on = True
+            if self._setting_type == "settings":
+                await self._device.set_setting(self._setting_key, 1)
+            elif self._setting_type == "preset":
+                # Используем маппинг для пресетов
+                preset_key = self._key_mapping.get(self._setting_key, self._setting_key.replace('preset_', ''))
+                await self._device.update_current_preset({preset_key: 1})
+            self.async_write_ha_state()
     
     async def async_turn_off(self, **kwargs):
         """Turn off the switch."""
-        self._attr_is_on = False
-        if self._setting_type == "settings":
-            await self._device.set_setting(self._setting_key, 0)
-        elif self._setting_type == "preset":
-            # Используем маппинг для пресетов
-            preset_key = self._key_mapping.get(self._setting_key, self._setting_key.replace('preset_', ''))
-            await self._device.update_current_preset({preset_key: 0})
-        self.async_write_ha_state()
\ No newline at end of file
+        with self._device.trace_command(self.entity_id, self._context):
+            self._attr_is_on = False
+            if self._setting_type == "settings":
+                await self._device.set_setting(self._setting_key, 0)
+            elif self._setting_type == "preset":
+                # Используем маппинг для пресетов
+                preset_key = self._key_mapping.get(self._setting_key, self._setting_key.replace('preset_', ''))
+                await self._device.update_current_preset({preset_key: 0})
+            self.async_write_ha_state()
\ No newline at end of file
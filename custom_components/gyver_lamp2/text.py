@@ -31,6 +31,8 @@ async def async_setup_entry(
 class GyverLamp2Text(TextEntity):
     """Text entity for network key."""
     
+    _attr_should_poll = False
+    
     def __init__(self, device: GyverLamp2Device, name: str, unique_id_suffix: str, default_value: str, icon: str, entity_category: EntityCategory):
         """Initialize text."""
         self._device = device
@@ -41,8 +43,10 @@ class GyverLamp2Text(TextEntity):
         self._attr_icon = icon
         self._attr_entity_category = entity_category
         self._attr_has_entity_name = True
-        
-        device.add_listener(self._handle_device_update)
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to device updates."""
+        self.async_on_remove(self._device.add_listener(self._handle_device_update))
     
     def _handle_device_update(self):
         """Handle device state updates."""
@@ -0,0 +1,77 @@
+"""Opt-in tracing of the entity → device → encode → send path."""
+from __future__ import annotations
+import contextvars
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Текущая трассировка: (correlation id, источник команды)
+_CURRENT_TRACE: contextvars.ContextVar[tuple[str, str] | None] = contextvars.ContextVar(
+    "gyver_lamp2_trace", default=None
+)
+
+def current_origin() -> str | None:
+    """Get origin of the command being handled, if any."""
+    trace = _CURRENT_TRACE.get()
+    return trace[1] if trace else None
+
+@contextmanager
+def origin_scope(origin: str):
+    """Mark the origin of a command without recording spans."""
+    token = _CURRENT_TRACE.set((None, origin))
+    try:
+        yield
+    finally:
+        _CURRENT_TRACE.reset(token)
+
+class GyverLamp2Tracer:
+    """Records timed spans into an in-memory ring buffer."""
+
+    def __init__(self, size: int):
+        self._spans = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    @contextmanager
+    def command(self, origin: str, correlation_id: str | None = None):
+        """Open the root span of a command started by an entity or service."""
+        if _CURRENT_TRACE.get() is not None:
+            # Вложенный вызов - остаемся в текущей трассировке
+            with self.span(origin):
+                yield
+            return
+
+        token = _CURRENT_TRACE.set((correlation_id or f"local-{next(self._ids)}", origin))
+        try:
+            with self.span("command"):
+                yield
+        finally:
+            _CURRENT_TRACE.reset(token)
+
+    @contextmanager
+    def span(self, name: str):
+        """Time one stage of the current command."""
+        wall = time.time()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            trace_id, origin = _CURRENT_TRACE.get() or (None, None)
+            self._spans.append((trace_id, origin, name, wall, duration_ms))
+
+    def as_list(self) -> list[dict]:
+        """Get recorded spans, oldest first."""
+        return [
+            {
+                'trace_id': trace_id,
+                'origin': origin,
+                'span': name,
+                'start': wall,
+                'duration_ms': round(duration_ms, 3),
+            }
+            for trace_id, origin, name, wall, duration_ms in self._spans
+        ]
@@ -0,0 +1,87 @@
+"""Host-side transitions for smooth fades."""
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Максимальная частота промежуточных кадров
+MAX_FRAME_RATE = 10
+
+class GyverLamp2Transitions:
+    """Runs at most one fade per property, merging overlapping requests."""
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._values: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def current(self, key: str, default: int) -> int:
+        """Get intermediate value of a running fade, or default."""
+        return self._values.get(key, default)
+
+    def is_running(self, key: str) -> bool:
+        """Check if a fade is running for the property."""
+        return key in self._tasks
+
+    def cancel(self, key: str):
+        """Cancel running fade for the property."""
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        self._values.pop(key, None)
+
+    def cancel_all(self):
+        """Cancel all running fades."""
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    def start(
+        self,
+        key: str,
+        start: int,
+        target: int,
+        duration: float,
+        send_step: Callable[[int], Awaitable],
+        finish: Callable[[], Awaitable],
+    ):
+        """Start a fade, replacing any fade already running for the property."""
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        self._values[key] = start
+        self._tasks[key] = self.hass.async_create_task(
+            self._async_run(key, start, target, duration, send_step, finish)
+        )
+
+    async def _async_run(self, key, start, target, duration, send_step, finish):
+        """Send intermediate values at a bounded rate, then finish on target."""
+        loop = asyncio.get_running_loop()
+        interval = 1 / MAX_FRAME_RATE
+        started = loop.time()
+        last = start
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                fraction = (loop.time() - started) / duration
+                if fraction >= 1:
+                    break
+                value = round(start + (target - start) * fraction)
+                if value != last:
+                    # Промежуточные кадры не сохраняются и не рассылаются слушателям
+                    await send_step(value)
+                    last = value
+                    self._values[key] = value
+        except Exception as e:
+            _LOGGER.error(f"Transition of {key} failed: {e}")
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+                self._values.pop(key, None)
+        await finish()
@@ -0,0 +1,131 @@
+"""WebSocket API returning the whole lamp model."""
+from __future__ import annotations
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import ATTR_DEVICE_ID
+from .device import GyverLamp2Device
+from .protocol import PRESET_KEYS
+from .services import get_device
+
+_LOGGER = logging.getLogger(__name__)
+
+def device_state(device: GyverLamp2Device) -> dict[str, Any]:
+    """Get lamp model as one compact payload; presets are rows of values in preset_fields order."""
+    return {
+        "name": device.entry.title,
+        "is_on": device.is_on,
+        "online_status": device.online_status,
+        "group": device.current_group,
+        "port": device.port,
+        # После случайной автосмены номер пресета неизвестен
+        "current_preset": device.current_preset if device.current_preset_known else None,
+        "preview": device.preview_active,
+        "settings": dict(device.settings),
+        "presets_count": len(device.presets),
+        "presets": [[int(preset.get(key, 0)) for key in PRESET_KEYS] for preset in device.presets],
+    }
+
+def state_diff(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    """Get changed fields; settings by key, presets as changed rows by preset number."""
+    diff = {}
+    for key, value in new.items():
+        if key == "settings":
+            changed = {name: item for name, item in value.items() if old[key].get(name) != item}
+        elif key == "presets":
+            previous = old[key]
+            changed = {
+                str(index + 1): row
+                for index, row in enumerate(value)
+                if index >= len(previous) or previous[index] != row
+            }
+        else:
+            if old[key] != value:
+                diff[key] = value
+            continue
+        if changed:
+            diff[key] = changed
+    return diff
+
+def _resolve(connection: websocket_api.ActiveConnection, hass: HomeAssistant, msg: dict) -> GyverLamp2Device | None:
+    """Get the requested lamp or answer with an error."""
+    try:
+        return get_device(hass, msg[ATTR_DEVICE_ID])
+    except HomeAssistantError as e:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, str(e))
+        return None
+
+@websocket_api.websocket_command({
+    vol.Required("type"): "gyver_lamp2/device_state",
+    vol.Required(ATTR_DEVICE_ID): str,
+})
+@callback
+def websocket_device_state(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+    """Return the whole lamp model."""
+    device = _resolve(connection, hass, msg)
+    if device is None:
+        return
+    connection.send_result(msg["id"], {
+        "revision": device.revision,
+        "preset_fields": PRESET_KEYS,
+        "state": device_state(device),
+    })
+
+@websocket_api.websocket_command({
+    vol.Required("type"): "gyver_lamp2/subscribe_device_state",
+    vol.Required(ATTR_DEVICE_ID): str,
+})
+@callback
+def websocket_subscribe_device_state(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+    """Send the lamp model once, then only its changes."""
+    device = _resolve(connection, hass, msg)
+    if device is None:
+        return
+    last = device_state(device)
+
+    def forward():
+        nonlocal last
+        state = device_state(device)
+        diff = state_diff(last, state)
+        if not diff:
+            return
+        last = state
+        connection.send_message(
+            websocket_api.event_message(msg["id"], {"revision": device.revision, "diff": diff})
+        )
+
+    @callback
+    def unloaded():
+        # Лампа перезагруженной записи - новый объект, клиент подписывается заново
+        connection.subscriptions.pop(msg["id"], None)
+        remove_listener()
+        connection.send_message(websocket_api.error_message(
+            msg["id"], "device_unloaded", f"{device.entry.title} was unloaded"
+        ))
+
+    remove_listener = device.add_listener(forward)
+    remove_stop_listener = device.add_stop_listener(unloaded)
+
+    @callback
+    def unsubscribe():
+        remove_listener()
+        remove_stop_listener()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+    connection.send_message(websocket_api.event_message(msg["id"], {
+        "revision": device.revision,
+        "preset_fields": PRESET_KEYS,
+        "state": last,
+    }))
+
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register WebSocket commands."""
+    websocket_api.async_register_command(hass, websocket_device_state)
+    websocket_api.async_register_command(hass, websocket_subscribe_device_state)
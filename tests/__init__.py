@@ -0,0 +1,37 @@
+"""Tests for the Gyver Lamp 2 integration."""
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from custom_components.gyver_lamp2.const import DOMAIN
+
+async def setup_entry(
+    hass: HomeAssistant,
+    options: dict = None,
+    title: str = "Lamp",
+    group: int = 1,
+    key: str = "GL",
+    ip: str = "192.168.1.",
+) -> MockConfigEntry:
+    """Add and set up a lamp entry."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title=title,
+        data={"ip_address": ip, "network_key": key, "group_number": group, "name": title},
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+def reset_storage_mocks():
+    """Forget calls recorded by the test storage mocks, which keep every Store and its data."""
+    for name in ("_async_load", "_async_write_data", "async_remove"):
+        if mock := getattr(getattr(Store, name), "mock", None):
+            mock.reset_mock()
+
+def get_device(hass: HomeAssistant, entry: MockConfigEntry):
+    """Get the lamp of an entry."""
+    return hass.data[DOMAIN][entry.entry_id]
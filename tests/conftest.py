@@ -0,0 +1,36 @@
+"""Fixtures for Gyver Lamp 2 tests."""
+import pytest
+
+from custom_components.gyver_lamp2.device import GyverLamp2Device
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+@pytest.fixture
+def sent_frames(monkeypatch) -> list[str]:
+    """Capture frames instead of sending them over UDP."""
+    frames = []
+    monkeypatch.setattr(
+        GyverLamp2Device, "_send_udp_command",
+        lambda self, cmd, ip, port, sock=None: frames.append(cmd),
+    )
+    monkeypatch.setattr(GyverLamp2Device, "_get_socket", lambda self: None)
+    return frames
+
+def pytest_addoption(parser):
+    """Add soak and memory test options."""
+    parser.addoption(
+        "--soak-commands", type=int, default=2000,
+        help="commands sent by the soak test (default: %(default)s, reduced local mode)",
+    )
+    parser.addoption(
+        "--fleet-sizes", default="1,10",
+        help="entry counts measured by the memory test, e.g. 1,10,100,500 (default: %(default)s)",
+    )
+
+@pytest.fixture
+def soak_commands(request) -> int:
+    """Get number of commands for the soak test."""
+    return request.config.getoption("--soak-commands")
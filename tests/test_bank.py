@@ -0,0 +1,40 @@
+"""Tests for preset bank decoding."""
+import json
+
+import pytest
+
+from custom_components.gyver_lamp2.bank import FORMAT_BINARY, FORMAT_JSON, decode_bank, encode_bank
+from custom_components.gyver_lamp2.protocol import DEFAULT_PRESET, build_presets_frame, main
+
+def test_json_round_trip():
+    """An exported JSON bank decodes back to the same presets."""
+    presets = [dict(DEFAULT_PRESET), {**DEFAULT_PRESET, 'effect': 6}]
+    assert decode_bank(encode_bank(presets, 2, FORMAT_JSON), FORMAT_JSON) == (presets, 2)
+
+@pytest.mark.parametrize("data", [
+    {'presets': [1]},
+    {'presets': ["preset"]},
+    {'presets': [None]},
+    {'presets': [[0] * 13]},
+    {'presets': [dict(DEFAULT_PRESET)], 'current_preset': None},
+    {'presets': [dict(DEFAULT_PRESET)], 'current_preset': [1]},
+])
+def test_json_malformed_raises_value_error(data):
+    """Malformed JSON banks are rejected with ValueError, not TypeError."""
+    with pytest.raises(ValueError):
+        decode_bank(data, FORMAT_JSON)
+
+@pytest.mark.parametrize("fmt", [FORMAT_JSON, FORMAT_BINARY])
+def test_cli_uploads_export_response(tmp_path, capsys, fmt):
+    """The bank command takes a saved export_presets response as is."""
+    presets = [dict(DEFAULT_PRESET), {**DEFAULT_PRESET, 'effect': 6}]
+    response = {"device-id": {"format": fmt, "count": 2, "size": 0, "data": encode_bank(presets, 2, fmt)}}
+    path = tmp_path / "bank.json"
+    path.write_text(json.dumps(response), encoding="utf-8")
+
+    assert main(["--dry-run", "bank", str(path)]) == 0
+    assert capsys.readouterr().out.strip() == build_presets_frame(presets, 2)
+
+    response["other-id"] = response["device-id"]
+    path.write_text(json.dumps(response), encoding="utf-8")
+    assert main(["--dry-run", "bank", str(path)]) == 1
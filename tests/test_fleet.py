@@ -0,0 +1,61 @@
+"""Tests for fleet batches."""
+import contextvars
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+
+from custom_components.gyver_lamp2.const import DOMAIN
+from custom_components.gyver_lamp2.fleet import current_batch, fleet_batch
+
+from . import get_device, setup_entry
+
+def test_batch_not_used_after_close():
+    """A context copied inside a batch does not get it back once closed."""
+    with fleet_batch() as batch:
+        assert current_batch() is batch
+        # Так контекст копируют async_call_later и create_task
+        context = contextvars.copy_context()
+    assert current_batch() is None
+    assert context.run(current_batch) is None
+    with pytest.raises(RuntimeError):
+        batch.sock
+
+def _device_id(hass: HomeAssistant, entry) -> str:
+    """Get device registry id of an entry's lamp."""
+    return dr.async_get(hass).async_get_device(identifiers={(DOMAIN, entry.entry_id)}).id
+
+async def _fleet_apply(hass: HomeAssistant, data: dict) -> dict:
+    """Call fleet_apply and get its per-lamp results."""
+    response = await hass.services.async_call(
+        DOMAIN, "fleet_apply", data, blocking=True, return_response=True
+    )
+    return response["lamps"]
+
+async def test_fleet_apply_edits_selected_preset(hass: HomeAssistant, sent_frames, socket_enabled):
+    """Preset fields go to the preset being selected, not the one being left."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    assert await device.insert_preset(2, {})
+    speed = device.presets[0]["speed"]
+
+    lamps = await _fleet_apply(hass, {"device_id": _device_id(hass, entry), "preset": 2, "speed": 7})
+    assert lamps[_device_id(hass, entry)]["success"]
+    assert device.current_preset == 2
+    assert device.presets[1]["speed"] == 7
+    assert device.presets[0]["speed"] == speed
+
+async def test_fleet_apply_reports_brightness_failure(
+    hass: HomeAssistant, sent_frames, socket_enabled, monkeypatch
+):
+    """A brightness frame that did not go out fails the lamp's result."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+
+    async def not_sent(settings_data: dict) -> bool:
+        return False
+
+    monkeypatch.setattr(device, "send_settings_command", not_sent)
+    lamps = await _fleet_apply(hass, {"device_id": _device_id(hass, entry), "brightness": 40})
+    assert not lamps[_device_id(hass, entry)]["success"]
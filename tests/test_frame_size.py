@@ -0,0 +1,96 @@
+"""Tests for the preset bank frame size budget."""
+import logging
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
+
+from custom_components.gyver_lamp2.const import (
+    CONF_MAX_FRAME_SIZE,
+    CONF_REFUSE_OVERSIZED,
+    DEFAULT_MAX_FRAME_SIZE,
+    DOMAIN,
+)
+from custom_components.gyver_lamp2.protocol import DEFAULT_PRESET
+
+from . import get_device, setup_entry
+
+# Банк из пресетов по умолчанию, текущий пресет 1
+BANK_SIZES = {1: 42, 20: 689, 40: 1369}
+
+def _bank(count: int) -> list[dict]:
+    """Build a bank of default presets."""
+    return [dict(DEFAULT_PRESET) for _ in range(count)]
+
+def _device_id(hass: HomeAssistant, entry) -> str:
+    """Get device registry id of an entry's lamp."""
+    return dr.async_get(hass).async_get_device(identifiers={(DOMAIN, entry.entry_id)}).id
+
+@pytest.mark.parametrize(("count", "size"), BANK_SIZES.items())
+async def test_bank_frame_size(hass: HomeAssistant, sent_frames, count: int, size: int):
+    """The GL,2 frame size is known up front and matches the frame sent."""
+    device = get_device(hass, await setup_entry(hass))
+    assert device.presets_frame_size(_bank(count)) == size
+
+    assert await device.import_presets(_bank(count), 1)
+    assert device.bank_size == size
+    assert len(sent_frames[-1]) == size
+    assert size <= DEFAULT_MAX_FRAME_SIZE
+
+async def test_oversized_bank_warns_once(hass: HomeAssistant, sent_frames, caplog):
+    """Without refusal an oversized bank is sent with one warning per revision."""
+    device = get_device(hass, await setup_entry(hass, {CONF_MAX_FRAME_SIZE: BANK_SIZES[20] - 1}))
+
+    with caplog.at_level(logging.WARNING):
+        assert await device.import_presets(_bank(20), 1)
+        assert await device.send_presets_command(device.presets)
+    assert sent_frames[-1].startswith("GL,2,20,")
+    assert caplog.text.count("over the 688 byte limit") == 1
+
+async def test_bank_at_limit_is_sent(hass: HomeAssistant, sent_frames, caplog):
+    """A bank exactly at the limit is neither refused nor warned about."""
+    device = get_device(hass, await setup_entry(
+        hass, {CONF_MAX_FRAME_SIZE: BANK_SIZES[20], CONF_REFUSE_OVERSIZED: True}
+    ))
+
+    with caplog.at_level(logging.WARNING):
+        assert await device.import_presets(_bank(20), 1)
+    assert len(sent_frames[-1]) == BANK_SIZES[20]
+    assert "byte limit" not in caplog.text
+
+async def test_oversized_bank_refused(hass: HomeAssistant, sent_frames):
+    """With refusal an oversized bank is neither applied nor sent."""
+    device = get_device(hass, await setup_entry(
+        hass, {CONF_MAX_FRAME_SIZE: BANK_SIZES[40] - 1, CONF_REFUSE_OVERSIZED: True}
+    ))
+    presets = list(device.presets)
+    sent = len(sent_frames)
+
+    assert not await device.import_presets(_bank(40), 1)
+    assert device.presets == presets
+    assert len(sent_frames) == sent
+
+async def test_update_preset_service_errors(hass: HomeAssistant, sent_frames):
+    """The service tells a missing preset from one refused by the budget."""
+    entry = await setup_entry(hass, {CONF_MAX_FRAME_SIZE: BANK_SIZES[20], CONF_REFUSE_OVERSIZED: True})
+    device = get_device(hass, entry)
+    assert await device.import_presets(_bank(20), 1)
+    device_id = _device_id(hass, entry)
+
+    with pytest.raises(HomeAssistantError, match="does not exist"):
+        await hass.services.async_call(
+            DOMAIN, "update_preset", {"device_id": device_id, "index": 21, "effect": 2}, blocking=True
+        )
+    # Эффект 10 длиннее на символ, банк перестает влезать в лимит
+    with pytest.raises(HomeAssistantError, match="frame size limit"):
+        await hass.services.async_call(
+            DOMAIN, "update_preset", {"device_id": device_id, "index": 5, "effect": 10}, blocking=True
+        )
+    assert device.presets[4]["effect"] == DEFAULT_PRESET["effect"]
+
+    await hass.services.async_call(
+        DOMAIN, "update_preset", {"device_id": device_id, "index": 5, "effect": 2}, blocking=True
+    )
+    assert device.presets[4]["effect"] == 2
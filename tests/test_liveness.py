@@ -0,0 +1,71 @@
+"""Tests for online tracking and frames held while a lamp is offline."""
+import asyncio
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.gyver_lamp2.const import CONF_ONLINE_TIMEOUT
+from custom_components.gyver_lamp2.liveness import STATUS_OFFLINE, STATUS_UNKNOWN
+from custom_components.gyver_lamp2.protocol import CMD_ON, MODE_CONTROL
+
+from . import get_device, setup_entry
+
+TIMEOUT = 0.05
+
+@pytest.fixture
+def port_blocked(hass: HomeAssistant, monkeypatch):
+    """Fail to listen on the group port."""
+    async def fail(*args, **kwargs):
+        raise OSError("Address already in use")
+    monkeypatch.setattr(hass.loop, "create_datagram_endpoint", fail)
+
+async def test_no_listener_keeps_sending(hass: HomeAssistant, sent_frames, port_blocked):
+    """Without a listener the status stays unknown and frames still go out."""
+    device = get_device(hass, await setup_entry(hass, {CONF_ONLINE_TIMEOUT: TIMEOUT}))
+    await asyncio.sleep(TIMEOUT * 3)
+
+    assert device.liveness.status == STATUS_UNKNOWN
+    assert await device.send_command(MODE_CONTROL, CMD_ON)
+    assert sent_frames[-1] == "GL,0,1"
+    assert device.backlog_size == 0
+
+async def test_silent_firmware_keeps_sending(hass: HomeAssistant, sent_frames, socket_enabled):
+    """A lamp never heard on the group port is not marked offline."""
+    entry = await setup_entry(hass, {CONF_ONLINE_TIMEOUT: TIMEOUT})
+    device = get_device(hass, entry)
+    await asyncio.sleep(TIMEOUT * 3)
+
+    assert device.liveness.status == STATUS_UNKNOWN
+    assert await device.send_command(MODE_CONTROL, CMD_ON)
+    assert sent_frames[-1] == "GL,0,1"
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+async def test_offline_frame_is_held_not_sent(hass: HomeAssistant, sent_frames, port_blocked):
+    """A lamp heard once and then silent is offline; its frames are held and reported as not sent."""
+    device = get_device(hass, await setup_entry(hass, {CONF_ONLINE_TIMEOUT: TIMEOUT}))
+    device.liveness.handle_datagram(b"GL,lamp", ("192.168.1.50", 50000))
+    await asyncio.sleep(TIMEOUT * 3)
+    sent = len(sent_frames)
+
+    assert device.liveness.status == STATUS_OFFLINE
+    assert not await device.send_command(MODE_CONTROL, CMD_ON)
+    assert not await device.send_presets_command(device.presets)
+    assert len(sent_frames) == sent
+    assert device.backlog_size == 2
+
+async def test_offline_stream_sample_is_dropped(hass: HomeAssistant, sent_frames, port_blocked):
+    """A stream sample not sent to an offline lamp is counted as dropped, not as a frame."""
+    device = get_device(hass, await setup_entry(hass, {CONF_ONLINE_TIMEOUT: TIMEOUT}))
+    device.liveness.handle_datagram(b"GL,lamp", ("192.168.1.50", 50000))
+    await asyncio.sleep(TIMEOUT * 3)
+    sent = len(sent_frames)
+
+    assert device.start_stream()
+    device.push_stream_sample(color=10, brightness=20)
+    await asyncio.sleep(0.05)
+    stats = await device.stop_stream()
+
+    # Сэмпл заменил еще не ушедший первый кадр, а сам не ушел из-за офлайна
+    assert (stats['frames'], stats['dropped'], stats['failures']) == (0, 2, 0)
+    assert len(sent_frames) == sent
@@ -0,0 +1,49 @@
+"""Memory cost of large lamp fleets."""
+import gc
+import logging
+import tracemalloc
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from . import reset_storage_mocks, setup_entry
+
+# Сохраненный бюджет памяти на одну запись: лампа, ее сущности и их состояния.
+# Замерено около 455 KiB, запас покрывает разницу версий Python и Home Assistant
+ENTRY_MEMORY_BUDGET = 768 * 1024
+
+# Записи логов, которые хранит pytest, к стоимости лампы не относятся
+NOT_RETAINED_BY_LAMPS = [
+    tracemalloc.Filter(False, logging.__file__),
+    tracemalloc.Filter(False, "*/_pytest/logging.py"),
+]
+
+def _retained() -> int:
+    """Get traced memory still in use, without test harness records."""
+    reset_storage_mocks()
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces(NOT_RETAINED_BY_LAMPS)
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+def pytest_generate_tests(metafunc):
+    """Measure the fleet sizes given by --fleet-sizes."""
+    if "count" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("--fleet-sizes").split(",")]
+        metafunc.parametrize("count", sizes)
+
+async def test_memory_per_entry(hass: HomeAssistant, sent_frames, count: int):
+    """Each set up lamp entry stays within the memory budget."""
+    # Первая запись загружает платформы и сервисы, это не стоимость лампы
+    await setup_entry(hass, title="Warm up")
+    tracemalloc.start()
+    try:
+        start = _retained()
+        for number in range(count):
+            await setup_entry(hass, title=f"Lamp {number}")
+        per_entry = (_retained() - start) / count
+    finally:
+        tracemalloc.stop()
+
+    print(f"{count} entries: {per_entry / 1024:.1f} KiB per entry")
+    assert per_entry < ENTRY_MEMORY_BUDGET, f"{per_entry / 1024:.1f} KiB per entry"
@@ -0,0 +1,65 @@
+"""Tests for cached preset select options."""
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant
+
+from custom_components.gyver_lamp2.device import GyverLamp2Device
+from custom_components.gyver_lamp2.protocol import EFFECTS
+
+from . import get_device, setup_entry
+
+PRESET_SELECT = "select.lamp_preset"
+
+async def _add_presets(hass: HomeAssistant, count: int):
+    """Press Add Preset several times."""
+    for _ in range(count):
+        await hass.services.async_call(
+            "button", "press", {ATTR_ENTITY_ID: "button.lamp_add_preset"}, blocking=True
+        )
+
+async def test_settings_and_preset_select_keep_options(hass: HomeAssistant, sent_frames):
+    """Settings changes and preset selection do not touch the preset bank."""
+    device = get_device(hass, await setup_entry(hass))
+    await _add_presets(hass, 3)
+    revision = device.presets_revision
+    options = hass.states.get(PRESET_SELECT).attributes["options"]
+
+    await hass.services.async_call(
+        "number", "set_value", {ATTR_ENTITY_ID: "number.lamp_brightness", "value": 100}, blocking=True
+    )
+    await hass.services.async_call(
+        "select", "select_option", {ATTR_ENTITY_ID: PRESET_SELECT, "option": options[2]}, blocking=True
+    )
+
+    assert device.presets_revision == revision
+    assert device.preset_options == options
+    assert hass.states.get(PRESET_SELECT).attributes["options"] == options
+    assert hass.states.get(PRESET_SELECT).state == options[2]
+
+async def test_effect_change_recomputes_one_label(hass: HomeAssistant, sent_frames, monkeypatch):
+    """Changing the current preset effect rebuilds only its label."""
+    device = get_device(hass, await setup_entry(hass))
+    await _add_presets(hass, 3)
+    options = list(device.preset_options)
+    await hass.services.async_call(
+        "select", "select_option", {ATTR_ENTITY_ID: PRESET_SELECT, "option": options[1]}, blocking=True
+    )
+
+    named = []
+    get_preset_name = GyverLamp2Device.get_preset_name
+    def spy(self, preset_number):
+        named.append(preset_number)
+        return get_preset_name(self, preset_number)
+    monkeypatch.setattr(GyverLamp2Device, "get_preset_name", spy)
+
+    revision = device.presets_revision
+    await hass.services.async_call(
+        "select", "select_option",
+        {ATTR_ENTITY_ID: "select.lamp_preset_effect", "option": EFFECTS[6]},
+        blocking=True,
+    )
+
+    assert device.presets_revision == revision + 1
+    new_options = hass.states.get(PRESET_SELECT).attributes["options"]
+    assert set(named) == {2}
+    assert new_options[1] != options[1] and EFFECTS[6] in new_options[1]
+    assert new_options[:1] + new_options[2:] == options[:1] + options[2:]
@@ -0,0 +1,27 @@
+"""Tests for previewing preset edits."""
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.gyver_lamp2.device import PREVIEW_UPLOAD_DELAY
+
+from . import get_device, setup_entry
+
+async def test_preview_upload_refreshes_preset_entities_only(hass: HomeAssistant, sent_frames):
+    """Preview uploads update preset field entities; other listeners catch up on commit."""
+    device = get_device(hass, await setup_entry(hass))
+    device.start_preview()
+    revision = device.revision
+
+    assert await device.update_preset(1, {'speed': 7})
+    assert await device.update_preset(1, {'color': 90})
+    await asyncio.sleep(PREVIEW_UPLOAD_DELAY + 0.1)
+    await hass.async_block_till_done()
+
+    assert sent_frames[-1] == device._build_presets_command(device.presets)
+    assert hass.states.get("number.lamp_preset_speed").state == "7"
+    assert hass.states.get("number.lamp_preset_color").state == "90"
+    assert device.revision == revision
+
+    assert await device.commit_preview()
+    assert device.revision == revision + 1
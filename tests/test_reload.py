@@ -0,0 +1,69 @@
+"""Tests for listener cleanup across entry reloads."""
+import gc
+import tracemalloc
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+
+from custom_components.gyver_lamp2.device import GyverLamp2Device
+
+from . import get_device, reset_storage_mocks, setup_entry
+
+RELOADS = 100
+# Допустимый прирост памяти, выделенной кодом интеграции, за одну перезагрузку
+RELOAD_MEMORY_BUDGET = 256
+
+# Учитываются только выделения в коде интеграции: Home Assistant 2024.3 сам держит
+# старые EntityPlatform после выгрузки
+OWN_CODE = [tracemalloc.Filter(True, "*/custom_components/gyver_lamp2/*")]
+
+async def _reload(hass: HomeAssistant, entry_id: str):
+    """Reload an entry and wait for it to settle."""
+    assert await hass.config_entries.async_reload(entry_id)
+    await hass.async_block_till_done()
+
+def _own_memory() -> int:
+    """Get memory still held by objects allocated in the integration code."""
+    reset_storage_mocks()
+    gc.collect()
+    return sum(stat.size for stat in tracemalloc.take_snapshot().filter_traces(OWN_CODE).statistics("filename"))
+
+def _live_objects() -> tuple[int, int]:
+    """Count lamps and integration entities still alive."""
+    gc.collect()
+    objects = gc.get_objects()
+    devices = sum(isinstance(obj, GyverLamp2Device) for obj in objects)
+    entities = sum(
+        isinstance(obj, Entity) and type(obj).__module__.startswith("custom_components.gyver_lamp2")
+        for obj in objects
+    )
+    return devices, entities
+
+async def test_reload_keeps_listeners_and_memory_flat(hass: HomeAssistant, sent_frames):
+    """Reloading an entry many times does not accumulate listeners or memory."""
+    entry = await setup_entry(hass)
+    first = get_device(hass, entry)
+    listeners = first.listeners_count
+    assert listeners > 0
+
+    await _reload(hass, entry.entry_id)
+    assert first.listeners_count == 0
+    del first
+
+    tracemalloc.start()
+    try:
+        # Первые перезагрузки заполняют кэши, их не считаем
+        for _ in range(10):
+            await _reload(hass, entry.entry_id)
+        start = _own_memory()
+        for _ in range(RELOADS):
+            await _reload(hass, entry.entry_id)
+            assert get_device(hass, entry).listeners_count == listeners
+        growth = _own_memory() - start
+    finally:
+        tracemalloc.stop()
+
+    entities = len(er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id))
+    assert _live_objects() == (1, entities)
+    assert growth / RELOADS < RELOAD_MEMORY_BUDGET, f"{growth / RELOADS:.0f} B retained per reload"
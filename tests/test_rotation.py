@@ -0,0 +1,41 @@
+"""Tests for modeling the lamp's own preset rotation."""
+from homeassistant.core import HomeAssistant
+
+from . import get_device, setup_entry
+
+AUTO = {'mode_change': 1, 'change_period': 1}
+
+async def test_staged_auto_mode_is_not_modeled(hass: HomeAssistant, sent_frames):
+    """A saved but unsent "Авто" mode does not start rotation after a group switch or reload."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    for key, value in AUTO.items():
+        await device.set_setting(key, value)
+    assert not device.rotation.active
+
+    await device.set_current_group(2)
+    await device.set_current_group(1)
+    assert not device.rotation.active
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert not get_device(hass, entry).rotation.active
+
+async def test_delivered_auto_mode_is_modeled(hass: HomeAssistant, sent_frames):
+    """Rotation follows the settings each group's lamp is known to hold."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    for key, value in AUTO.items():
+        await device.set_setting(key, value)
+    assert await device.send_settings_command(device.settings)
+    assert device.rotation.active
+
+    # Группа 2 начинается с копии настроек, но лампа их еще не получала
+    await device.set_current_group(2)
+    assert not device.rotation.active
+    await device.set_current_group(1)
+    assert device.rotation.active
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert get_device(hass, entry).rotation.active
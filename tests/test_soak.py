@@ -0,0 +1,166 @@
+"""Soak test of the send path.
+
+Reduced mode runs by default; a long run:
+python -m pytest tests/test_soak.py --soak-commands 1000000
+"""
+import asyncio
+import gc
+import logging
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.gyver_lamp2.protocol import calculate_port
+
+from . import reset_storage_mocks, setup_entry
+
+LAMPS = 3
+KEY = "GL"
+GROUPS = range(1, 9)
+WINDOWS = 10
+SEED = 2077
+
+# Допустимый дрейф последнего окна относительно первого после прогрева
+FD_DRIFT = 2
+TASK_DRIFT = 5
+# Банки пресетов и кэши растут до своих пределов; утечка на команду в долгом
+# прогоне быстро выходит за этот запас
+MEMORY_DRIFT = 1024 * 1024
+LATENCY_DRIFT = 3.0
+# Разброс задержек в коротком прогоне, мс
+LATENCY_FLOOR_MS = 5.0
+
+# Кнопки, которые ждут лампу секундами, в прогоне не нажимаются
+SKIPPED_BUTTONS = ("reboot_lamp",)
+
+NOT_RETAINED_BY_LAMPS = [
+    tracemalloc.Filter(False, logging.__file__),
+    tracemalloc.Filter(False, "*/_pytest/logging.py"),
+]
+
+class Receiver(asyncio.DatagramProtocol):
+    """Counts frames arriving on the loopback."""
+
+    def __init__(self):
+        self.frames = 0
+
+    def datagram_received(self, data, addr):
+        self.frames += 1
+
+def _open_fds() -> int:
+    """Count open file descriptors of the process."""
+    return len(os.listdir("/proc/self/fd"))
+
+def _memory() -> int:
+    """Get traced memory, without records kept by the test harness."""
+    reset_storage_mocks()
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces(NOT_RETAINED_BY_LAMPS)
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+def _commands(hass: HomeAssistant, entry_ids: list[str]) -> list[tuple]:
+    """Get (domain, service, entity_id) of the controls under test."""
+    registry = er.async_get(hass)
+    controls = []
+    for entry_id in entry_ids:
+        for entity in er.async_entries_for_config_entry(registry, entry_id):
+            if entity.domain == "button" and entity.entity_id.endswith(SKIPPED_BUTTONS):
+                continue
+            if entity.domain in ("number", "select", "button", "switch", "light"):
+                controls.append((entity.domain, entity.entity_id))
+    return controls
+
+def _random_call(hass: HomeAssistant, rng: random.Random, domain: str, entity_id: str) -> tuple[str, dict]:
+    """Get a random service call for a control."""
+    data = {ATTR_ENTITY_ID: entity_id}
+    if domain == "number":
+        attributes = hass.states.get(entity_id).attributes
+        step = attributes.get("step", 1)
+        steps = int((attributes["max"] - attributes["min"]) / step)
+        data["value"] = attributes["min"] + rng.randint(0, steps) * step
+        return "set_value", data
+    if domain == "select":
+        data["option"] = rng.choice(hass.states.get(entity_id).attributes["options"])
+        return "select_option", data
+    if domain == "button":
+        return "press", data
+    if domain == "switch":
+        return "toggle", data
+    if rng.random() < 0.5:
+        return "turn_off", data
+    data["brightness"] = rng.randint(1, 255)
+    return "turn_on", data
+
+def _percentile(values: list[float], percent: int) -> float:
+    """Get a percentile of latencies."""
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+async def test_soak_send_path(hass: HomeAssistant, socket_enabled, soak_commands: int):
+    """Random commands keep latency, descriptors, tasks and memory flat."""
+    loop = asyncio.get_running_loop()
+    receiver = Receiver()
+    transports = []
+    for group in GROUPS:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: receiver, local_addr=("0.0.0.0", calculate_port(KEY, group))
+        )
+        transports.append(transport)
+
+    entries = [
+        await setup_entry(hass, title=f"Soak {number}", group=1 + number % 2, key=KEY, ip="127.0.0.")
+        for number in range(LAMPS)
+    ]
+    controls = _commands(hass, [entry.entry_id for entry in entries])
+    rng = random.Random(SEED)
+    window_size = max(soak_commands // WINDOWS, 100)
+    windows = []
+
+    tracemalloc.start()
+    try:
+        sent = 0
+        while sent < soak_commands:
+            latencies = []
+            for _ in range(window_size):
+                domain, entity_id = rng.choice(controls)
+                service, data = _random_call(hass, rng, domain, entity_id)
+                started = time.perf_counter()
+                await hass.services.async_call(domain, service, data, blocking=True)
+                latencies.append((time.perf_counter() - started) * 1000)
+            sent += window_size
+            await hass.async_block_till_done()
+            windows.append({
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "fds": _open_fds(),
+                "tasks": len(asyncio.all_tasks()),
+                "memory": _memory(),
+            })
+    finally:
+        tracemalloc.stop()
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+        for transport in transports:
+            transport.close()
+
+    for number, window in enumerate(windows):
+        print(
+            f"window {number}: p50 {window['p50']:.2f} ms, p95 {window['p95']:.2f} ms, "
+            f"p99 {window['p99']:.2f} ms, fds {window['fds']}, tasks {window['tasks']}, "
+            f"memory {window['memory'] / 1024:.0f} KiB"
+        )
+    print(f"{sent} commands, {receiver.frames} frames received")
+
+    # Первое окно заполняет банки пресетов и кэши
+    first, last = windows[1], windows[-1]
+    assert receiver.frames > 0
+    assert last["fds"] - first["fds"] <= FD_DRIFT
+    assert last["tasks"] - first["tasks"] <= TASK_DRIFT
+    assert last["memory"] - first["memory"] <= MEMORY_DRIFT
+    assert last["p95"] <= max(first["p95"] * LATENCY_DRIFT, LATENCY_FLOOR_MS)
@@ -0,0 +1,61 @@
+"""Tests for the stored state layout."""
+from homeassistant.core import HomeAssistant
+
+from custom_components.gyver_lamp2.device import STORAGE_KEY
+from custom_components.gyver_lamp2.protocol import DEFAULT_PRESET
+
+from . import get_device, setup_entry
+
+async def _reload(hass: HomeAssistant, entry):
+    """Reload an entry and get its new lamp."""
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    return get_device(hass, entry)
+
+async def test_groups_survive_switch_and_reload(hass: HomeAssistant, hass_storage, sent_frames):
+    """Each group's bank, current preset and fingerprints come back after A→B→A and a reload."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    assert await device.import_presets([dict(DEFAULT_PRESET), {**DEFAULT_PRESET, 'effect': 6}], 2)
+
+    await device.set_current_group(2)
+    assert await device.update_preset(1, {'effect': 3})
+    await device.set_current_group(1)
+    first = ([preset.copy() for preset in device.presets], device.current_preset, dict(device._fingerprints))
+    second = device._group_fingerprints[2]
+
+    device = await _reload(hass, entry)
+    main = hass_storage[f"{STORAGE_KEY}_{entry.entry_id}"]["data"]
+    sent = hass_storage[f"{STORAGE_KEY}_{entry.entry_id}_sent"]["data"]
+    assert main['current_group'] == 1
+    assert set(main['groups']) == {"2"}
+    assert set(sent['groups']) == {"1", "2"}
+
+    assert (device.presets, device.current_preset, device._fingerprints) == first
+    sent_frames.clear()
+    await device.set_current_group(2)
+    assert [preset['effect'] for preset in device.presets] == [3, 6]
+    assert device.current_preset == 2
+    assert device._fingerprints == second
+    # Лампы группы 2 уже держат свой банк - переключение ничего не досылает
+    assert not sent_frames
+
+async def test_flat_fingerprints_still_load(hass: HomeAssistant, hass_storage, sent_frames):
+    """Fingerprints saved before groups were stored belong to the current group."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    assert await device.import_presets([dict(DEFAULT_PRESET)], 1)
+    fingerprints = dict(device._fingerprints)
+    assert fingerprints
+
+    device.async_stop()
+    await hass.async_block_till_done()
+    hass_storage[f"{STORAGE_KEY}_{entry.entry_id}_sent"]["data"] = fingerprints
+    sent_frames.clear()
+
+    device = await _reload(hass, entry)
+    assert hass_storage[f"{STORAGE_KEY}_{entry.entry_id}_sent"]["data"] == fingerprints
+    assert device._fingerprints == fingerprints
+    assert device._group_fingerprints == {}
+    # Отпечатки совпали с банком - запуск ничего не досылает
+    assert not sent_frames
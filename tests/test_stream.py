@@ -0,0 +1,35 @@
+"""Tests for streaming samples to the lamp."""
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.gyver_lamp2.device import GyverLamp2Device
+
+from . import get_device, setup_entry
+
+class BrokenSocket:
+    """Socket left over from a network that is gone."""
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+async def test_stream_send_error_closes_socket(hass: HomeAssistant, sent_frames, monkeypatch):
+    """A failed stream send counts as a failure and drops the broken socket."""
+    device = get_device(hass, await setup_entry(hass))
+
+    def fail(self, cmd, ip, port, sock=None):
+        raise OSError("Network is unreachable")
+
+    monkeypatch.setattr(GyverLamp2Device, "_send_udp_command_timed", fail)
+    sock = device._sock = BrokenSocket()
+
+    assert device.start_stream()
+    device.push_stream_sample(color=10, brightness=20)
+    await asyncio.sleep(0.05)
+    assert device.stream.as_dict()['failures'] == 1
+    assert device.stream.as_dict()['frames'] == 0
+    assert sock.closed
+    assert device._sock is None
+    device.stream.stop()
@@ -0,0 +1,58 @@
+"""Tests for preset field transitions."""
+import asyncio
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
+
+from custom_components.gyver_lamp2.const import DOMAIN
+
+from . import get_device, setup_entry
+
+TRANSITION = 0.5
+
+def _device_id(hass: HomeAssistant, entry) -> str:
+    """Get device registry id of an entry's lamp."""
+    return dr.async_get(hass).async_get_device(identifiers={(DOMAIN, entry.entry_id)}).id
+
+async def test_update_preset_transition(hass: HomeAssistant, sent_frames):
+    """Brightness and color of the current preset fade, other fields change at once."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    sent_frames.clear()
+
+    await hass.services.async_call(
+        DOMAIN, "update_preset",
+        {"device_id": _device_id(hass, entry), "index": 1, "bright": 55, "color": 200,
+         "speed": 7, "transition": TRANSITION},
+        blocking=True,
+    )
+    assert device.presets[0]["speed"] == 7
+    assert device.presets[0]["bright"] == 255
+    await asyncio.sleep(TRANSITION + 0.3)
+    await hass.async_block_till_done()
+
+    assert device.presets[0]["bright"] == 55
+    assert device.presets[0]["color"] == 200
+    assert len(device.transitions) == 0
+    # Промежуточные кадры банка плюс итоговые
+    frames = [frame for frame in sent_frames if frame.startswith("GL,2,")]
+    assert len(set(frames)) > 3
+    assert frames[-1] == device._build_presets_command(device.presets)
+
+async def test_transition_needs_current_preset(hass: HomeAssistant, sent_frames):
+    """A transition on a preset the lamp is not showing is refused."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    assert await device.insert_preset(2, {})
+
+    with pytest.raises(HomeAssistantError, match="current preset"):
+        await hass.services.async_call(
+            DOMAIN, "update_preset",
+            {"device_id": _device_id(hass, entry), "index": 2, "bright": 10, "transition": 1},
+            blocking=True,
+        )
+    assert device.presets[1]["bright"] == 255
+    assert len(device.transitions) == 0
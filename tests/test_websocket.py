@@ -0,0 +1,58 @@
+"""Tests for the lamp model WebSocket commands."""
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+
+from custom_components.gyver_lamp2.const import DOMAIN
+from custom_components.gyver_lamp2.websocket import websocket_subscribe_device_state
+
+from . import get_device, setup_entry
+
+def _connection() -> MagicMock:
+    """Get a connection recording sent messages."""
+    connection = MagicMock()
+    connection.subscriptions = {}
+    return connection
+
+async def test_subscription_ends_on_unload(hass: HomeAssistant, sent_frames):
+    """A reloaded entry ends its subscriptions instead of leaving them silent."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    device_id = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, entry.entry_id)}).id
+    connection = _connection()
+    listeners = device.listeners_count
+
+    websocket_subscribe_device_state(
+        hass, connection, {"id": 5, "type": "gyver_lamp2/subscribe_device_state", "device_id": device_id}
+    )
+    assert 5 in connection.subscriptions
+    assert device.listeners_count == listeners + 1
+    sent = connection.send_message.call_count
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert 5 not in connection.subscriptions
+    message = connection.send_message.call_args_list[sent][0][0]
+    assert message["id"] == 5
+    assert message["type"] == "result" and not message["success"]
+    assert message["error"]["code"] == "device_unloaded"
+
+async def test_unsubscribe_removes_listeners(hass: HomeAssistant, sent_frames):
+    """Unsubscribing drops both the state and the unload listener."""
+    entry = await setup_entry(hass)
+    device = get_device(hass, entry)
+    device_id = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, entry.entry_id)}).id
+    connection = _connection()
+    listeners = device.listeners_count
+
+    websocket_subscribe_device_state(
+        hass, connection, {"id": 7, "type": "gyver_lamp2/subscribe_device_state", "device_id": device_id}
+    )
+    connection.subscriptions.pop(7)()
+    assert device.listeners_count == listeners
+    sent = connection.send_message.call_count
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert connection.send_message.call_count == sent